@@ -21,8 +21,13 @@ import hashlib
 # Add CDCS path
 CDCS_PATH = Path("/Users/sac/claude-desktop-context")
 sys.path.append(str(CDCS_PATH / "automation"))
+sys.path.append(str(CDCS_PATH))
 
 from base_agent import BaseAgent
+from automation.session_archive import SessionArchive, entry_name, is_pointer
+
+SESSIONS_DIR = CDCS_PATH / "memory" / "sessions"
+SESSION_ARCHIVE = SESSIONS_DIR / "compressed" / "sessions.cdar"
 
 class SystemIssue:
     """Represents a detected system issue"""
@@ -479,22 +484,11 @@ class SelfHealingLoop(BaseAgent):
             return {'success': False, 'error': str(e)}
             
     def compress_old_sessions(self, issue: SystemIssue) -> Dict:
-        """Compress old session files"""
+        """Move old session files into the session archive"""
         try:
-            import gzip
-            compressed = 0
-            
-            sessions_dir = CDCS_PATH / "memory" / "sessions"
-            for session_file in sessions_dir.glob("**/*.md"):
-                if session_file.stat().st_mtime < time.time() - (3 * 24 * 3600):  # 3 days
-                    content = session_file.read_bytes()
-                    compressed_path = session_file.with_suffix('.md.gz')
-                    
-                    with gzip.open(compressed_path, 'wb') as f:
-                        f.write(content)
-                        
-                    session_file.unlink()
-                    compressed += 1
+            old_sessions = [f for f in SESSIONS_DIR.glob("**/*.md")
+                            if f.stat().st_mtime < time.time() - (3 * 24 * 3600)]  # 3 days
+            compressed = self.archive_sessions(old_sessions)
                     
             return {
                 'success': True,
@@ -504,6 +498,25 @@ class SelfHealingLoop(BaseAgent):
         except Exception as e:
             return {'success': False, 'error': str(e)}
             
+    def archive_sessions(self, session_files: List[Path]) -> int:
+        """Move session files into the archive as one batch; returns how many moved"""
+        # Pointers left by the memory optimizer stay: they lead to the archived original
+        session_files = [f for f in session_files if not is_pointer(f)]
+        
+        # One batch, one index; files are removed only once the batch is durable
+        archive = SessionArchive(SESSION_ARCHIVE)
+        try:
+            archive.append_many(
+                (entry_name('session', str(f.relative_to(SESSIONS_DIR))), f.read_bytes(),
+                 {'mtime': f.stat().st_mtime})
+                for f in session_files
+            )
+        finally:
+            archive.close()
+        for session_file in session_files:
+            session_file.unlink()
+        return len(session_files)
+        
     def remove_temp_files(self, issue: SystemIssue) -> Dict:
         """Remove temporary files"""
         try:
@@ -538,16 +551,8 @@ class SelfHealingLoop(BaseAgent):
                     
             actions.append(f"Removed {log_count} log files")
             
-            # Compress all uncompressed sessions
-            session_count = 0
-            import gzip
-            for session in CDCS_PATH.rglob("*.md"):
-                if 'sessions' in str(session):
-                    content = session.read_bytes()
-                    with gzip.open(session.with_suffix('.md.gz'), 'wb') as f:
-                        f.write(content)
-                    session.unlink()
-                    session_count += 1
+            # Archive all uncompressed sessions
+            session_count = self.archive_sessions(list(SESSIONS_DIR.rglob("*.md")))
                     
             actions.append(f"Compressed {session_count} sessions")
             
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Agent Scheduler - Dependency-aware concurrent executor for automation agents
+Agents declare the resources they read and write; non-conflicting agents run in parallel
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Set, Tuple
+
+# Agents without declarations are assumed to touch everything
+ALL_RESOURCES = frozenset({'*'})
+
+
+def agent_resources(agent_class) -> Tuple[Set[str], Set[str]]:
+    """Return the (reads, writes) declared on an agent class"""
+    reads = set(getattr(agent_class, 'reads', ALL_RESOURCES))
+    writes = set(getattr(agent_class, 'writes', ALL_RESOURCES))
+    return reads, writes
+
+
+def _conflicts(a: Set[str], b: Set[str]) -> bool:
+    return bool(a & b or ('*' in a and b) or ('*' in b and a))
+
+
+class AgentScheduler:
+    """Runs agents as a DAG derived from their read/write declarations"""
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+
+    def build_dependencies(self, agents: List[Tuple[str, type]]) -> Dict[str, Set[str]]:
+        """An agent depends on every earlier agent it has a data hazard with"""
+        declared = [(name, *agent_resources(cls)) for name, cls in agents]
+        dependencies = {}
+
+        for i, (name, reads, writes) in enumerate(declared):
+            dependencies[name] = set()
+            for earlier, earlier_reads, earlier_writes in declared[:i]:
+                if (_conflicts(earlier_writes, reads) or      # read after write
+                        _conflicts(earlier_reads, writes) or  # write after read
+                        _conflicts(earlier_writes, writes)):  # write after write
+                    dependencies[name].add(earlier)
+
+        return dependencies
+
+    def run(self, agents: List[Tuple[str, type]],
+            run_agent: Callable[[str, type], Dict]) -> Dict[str, Dict]:
+        """Execute every agent once; returns per-agent result, timing and error"""
+        dependencies = self.build_dependencies(agents)
+        classes = dict(agents)
+        pending = dict(dependencies)
+        completed = set()
+        outcomes = {}
+        cycle_start = time.perf_counter()
+
+        def timed(name):
+            started = time.perf_counter()
+            outcome = {
+                'result': None,
+                'error': None,
+                'depends_on': sorted(dependencies[name])
+            }
+            try:
+                outcome['result'] = run_agent(name, classes[name])
+            except Exception as e:
+                outcome['error'] = f"{type(e).__name__}: {e}"
+            finished = time.perf_counter()
+            outcome['start_offset'] = started - cycle_start
+            outcome['end_offset'] = finished - cycle_start
+            outcome['execution_time'] = finished - started
+            return outcome
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="cdcs-agent") as executor:
+            running = {}
+
+            while pending or running:
+                ready = [name for name, deps in pending.items() if deps <= completed]
+                for name in ready:
+                    del pending[name]
+                    running[executor.submit(timed, name)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outcomes[name] = future.result()
+                    completed.add(name)
+
+        return outcomes
+
+    @staticmethod
+    def critical_path(outcomes: Dict[str, Dict]) -> Tuple[List[str], float]:
+        """Longest chain of dependent agents by execution time"""
+        finish = {}
+        previous = {}
+
+        for name in sorted(outcomes, key=lambda n: outcomes[n]['end_offset']):
+            deps = outcomes[name]['depends_on']
+            before = max(deps, key=lambda d: finish[d], default=None)
+            finish[name] = outcomes[name]['execution_time'] + (finish[before] if before else 0.0)
+            previous[name] = before
+
+        if not finish:
+            return [], 0.0
+
+        tail = max(finish, key=finish.get)
+        path = []
+        node = tail
+        while node:
+            path.append(node)
+            node = previous[node]
+
+        return list(reversed(path)), finish[tail]
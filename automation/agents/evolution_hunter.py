@@ -10,13 +10,21 @@ from typing import Dict, List, Tuple
 import datetime
 import numpy as np
 
+from automation.ann_index import IVFIndex, INDEX_ROOT, hash_embedding
+from automation.pattern_catalog import shared_catalog
+
 class EvolutionHunter:
+    reads = {'sessions', 'automation_runs', 'patterns_catalog'}
+    writes = {'evolution'}
+    
     def __init__(self, orchestrator):
         self.orchestrator = orchestrator
         self.task_description = "Hunting for evolution opportunities"
         self.evolution_path = Path("/Users/sac/claude-desktop-context/evolution")
         self.mutations_path = self.evolution_path / "mutations"
         self.mutations_path.mkdir(parents=True, exist_ok=True)
+        self.catalog = shared_catalog()
+        self.pattern_index = IVFIndex(INDEX_ROOT / "patterns")
         
     def analyze_performance_bottlenecks(self) -> List[Dict]:
         """Identify system performance bottlenecks"""
@@ -24,8 +32,7 @@ class EvolutionHunter:
         bottlenecks = []
         
         # Analyze recent automation runs
-        import sqlite3
-        conn = sqlite3.connect(self.orchestrator.db_path)
+        conn = self.orchestrator.db.connection()
         
         # Find slow operations
         slow_ops = conn.execute("""
@@ -65,7 +72,6 @@ class EvolutionHunter:
                 'severity': min(memory_patterns[1] / 10000, 1.0)
             })
             
-        conn.close()
         return bottlenecks
         
     def identify_repetitive_operations(self, sessions: List[Dict]) -> List[Dict]:
@@ -118,17 +124,50 @@ class EvolutionHunter:
             
         return repetitive_ops
         
-    def discover_capability_combinations(self) -> List[Dict]:
-        """Find unexplored combinations of existing capabilities"""
+    def update_pattern_index(self) -> List[Path]:
+        """Embed catalog patterns that are new or changed since they were indexed"""
+        manifest_path = self.pattern_index.directory / "patterns.json"
+        indexed = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+        
+        # The catalog's path list can be a refresh interval old, so files may be gone
+        mtimes = {}
+        for p in map(Path, self.catalog.paths()):
+            try:
+                mtimes[p] = p.stat().st_mtime
+            except OSError:
+                continue
+        embeddings = {}
+        for p in [p for p, mtime in mtimes.items() if indexed.get(str(p)) != mtime]:
+            try:
+                embeddings[p] = hash_embedding(p.stem.replace('_', ' ') + '\n' + p.read_text(errors='replace'))
+            except OSError:
+                del mtimes[p]
+                
+        vanished = [key for key in indexed if Path(key) not in mtimes]
+        if embeddings or vanished:
+            if embeddings:
+                # Re-adding a key supersedes the pattern's previous vector
+                self.pattern_index.extend(list(embeddings.values()), [str(p) for p in embeddings])
+            for key in vanished:
+                del indexed[key]
+            indexed.update({str(p): mtimes[p] for p in embeddings})
+            manifest_path.write_text(json.dumps(indexed))
+            
+        return list(mtimes)
         
-        # Get current patterns
-        patterns_path = Path("/Users/sac/claude-desktop-context/patterns/catalog")
-        existing_patterns = []
+    def discover_capability_combinations(self, sessions: List[Dict] = None) -> List[Dict]:
+        """Find unexplored combinations of existing capabilities"""
         
-        if patterns_path.exists():
-            for pattern_file in patterns_path.rglob("*.md"):
-                existing_patterns.append(pattern_file.stem)
-                
+        # Get current patterns, most relevant to recent work first
+        pattern_files = self.update_pattern_index()
+        if sessions:
+            context = '\n'.join(s['content'][:2000] for s in sessions[:5])
+            current = {str(p) for p in pattern_files}  # Deleted patterns stay in the index
+            nearest = self.pattern_index.search_keys(hash_embedding(context), 40)
+            existing_patterns = [Path(key).stem for key, _ in nearest if key in current][:20]
+        else:
+            existing_patterns = [p.stem for p in pattern_files]
+            
         # Use ollama to suggest combinations
         system_prompt = """Given these existing CDCS patterns, suggest novel combinations that could create emergent capabilities.
         Think about:
@@ -342,10 +381,10 @@ class EvolutionHunter:
         if sessions:
             repetitive = self.identify_repetitive_operations(sessions)
             all_opportunities.extend(repetitive)
-            metrics['tokens_processed'] += sum(len(s['content']) // 4 for s in sessions[:5])
+            metrics['tokens_processed'] += sum(s['size'] // 4 for s in sessions[:5])
             
         # 3. Discover capability combinations
-        combinations = self.discover_capability_combinations()
+        combinations = self.discover_capability_combinations(sessions)
         all_opportunities.extend(combinations)
         
         # 4. Analyze failure patterns
@@ -5,6 +5,7 @@ Compensates for high urgency tendency to rush past important details
 """
 
 import os
+import sys
 import json
 import subprocess
 import datetime
@@ -13,12 +14,17 @@ import re
 import sqlite3
 from typing import List, Dict, Any
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from automation.llm_client import OllamaClient
+
 class DetailGuardian:
     """Automated detail tracking for high-D execution style"""
     
     def __init__(self):
         self.db_path = Path.home() / "claude-desktop-context" / "automation" / "detail_guardian.db"
         self.ollama_model = "llama3"
+        self.llm = OllamaClient(model=self.ollama_model)
         self.init_database()
         
     def init_database(self):
@@ -114,17 +120,10 @@ class DetailGuardian:
         """
         
         try:
-            result = subprocess.run(
-                ["ollama", "run", self.ollama_model, prompt],
-                capture_output=True,
-                text=True
-            )
-            # Parse response (simplified for now)
+            response = json.loads(self.llm.generate(prompt, format="json"))
             return {
-                "action_items": ["Review contract details", "Send follow-up to Tyler"],
-                "important_details": ["Budget limit: $2M", "Deadline: Wednesday"],
-                "deadlines": ["Ecuador meeting: Wednesday"],
-                "follow_ups": ["Tyler - Ecuador prep", "Jasmine - UAE update"]
+                key: response.get(key, [])
+                for key in ("action_items", "important_details", "deadlines", "follow_ups")
             }
         except:
             return {}
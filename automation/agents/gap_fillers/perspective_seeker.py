@@ -5,6 +5,7 @@ Compensates for "hearing only what you want to hear" tendency
 """
 
 import os
+import sys
 import json
 import subprocess
 import datetime
@@ -12,12 +13,17 @@ from pathlib import Path
 import sqlite3
 from typing import List, Dict, Any
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from automation.llm_client import OllamaClient
+
 class PerspectiveSeeker:
     """Multi-viewpoint analysis to combat selective listening"""
     
     def __init__(self):
         self.db_path = Path.home() / "claude-desktop-context" / "automation" / "perspectives.db"
         self.ollama_model = "mistral"
+        self.llm = OllamaClient(model=self.ollama_model, timeout=30)
         self.init_database()
         
     def init_database(self):
@@ -87,17 +93,12 @@ class PerspectiveSeeker:
         for persona in personas:
             try:
                 # Use Ollama for perspective generation
-                result = subprocess.run(
-                    ["ollama", "run", self.ollama_model, persona["prompt"]],
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
+                viewpoint = self.llm.generate(persona["prompt"])
                 
                 perspectives.append({
                     "type": persona["type"],
                     "name": persona["name"],
-                    "viewpoint": result.stdout.strip(),
+                    "viewpoint": viewpoint,
                     "confidence": 0.8
                 })
             except:
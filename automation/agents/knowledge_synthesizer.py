@@ -5,133 +5,154 @@ Uses ollama/qwen3 to find connections and synthesize insights
 """
 
 import json
-import networkx as nx
+import os
+import re
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterator, List, Set, Tuple
 import datetime
 import numpy as np
-from collections import defaultdict
+
+from automation.concept_graph import ConceptGraph, HAS_NETWORKX, nx
+from automation.knowledge_store import KnowledgeStore
+
+# Capitalized terms and multi-word names ("Pattern Miner"), compiled once
+CAPITALIZED_TERM = re.compile(r'\b[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*\b')
+
+# Characters of each session sent to the model
+EXCERPT_CHARS = 2000
+
+CONCEPT_SCHEMA = """{
+                    "name": "concept name",
+                    "type": "technical|domain|system",
+                    "description": "brief description",
+                    "related_to": ["other", "concepts"],
+                    "importance": 0.0-1.0
+                }"""
+
+
+def corpus_term_frequencies(texts: List[str]) -> List[Counter]:
+    """Capitalized-term counts for every document in one regex pass each"""
+    findall = CAPITALIZED_TERM.findall
+    return [Counter(term for term in findall(text) if len(term) > 3) for text in texts]
+
 
 class KnowledgeSynthesizer:
+    reads = {'sessions'}
+    writes = {'knowledge'}
+    
     def __init__(self, orchestrator):
         self.orchestrator = orchestrator
         self.task_description = "Synthesizing knowledge across sessions"
         self.knowledge_path = Path("/Users/sac/claude-desktop-context/knowledge")
         self.knowledge_path.mkdir(parents=True, exist_ok=True)
-        self.graph = nx.DiGraph()
-        
-    def extract_concepts(self, text: str) -> List[Dict]:
-        """Extract key concepts from text using ollama"""
-        
-        system_prompt = """Extract key concepts from this CDCS session.
-        Focus on:
-        1. Technical concepts (tools, patterns, algorithms)
-        2. Domain concepts (problems, solutions, approaches)
-        3. System concepts (CDCS components, capabilities)
-        4. Relationships between concepts
+        self.store = KnowledgeStore(self.knowledge_path / "knowledge_graph.db")
+        self.graph = ConceptGraph.from_store(self.store)
+        self.merged_sessions = []
+        # Approximate prompt tokens per batched extraction request
+        self.extraction_token_budget = int(os.environ.get("CDCS_EXTRACT_TOKEN_BUDGET", "6000"))
+        self.extraction_stats = {'requests': 0, 'documents': 0, 'fallback_documents': 0}
+        
+    def iter_extraction_batches(self, sessions: List[Dict]) -> Iterator[List[Dict]]:
+        """Group sessions so each batched prompt stays within the token budget"""
+        batch, tokens = [], 0
+        for session in sessions:
+            # ~4 characters per token, plus the document delimiter
+            cost = min(session['size'], EXCERPT_CHARS) // 4 + 16
+            if batch and tokens + cost > self.extraction_token_budget:
+                yield batch
+                batch, tokens = [], 0
+            batch.append(session)
+            tokens += cost
+        if batch:
+            yield batch
+            
+    def extract_concepts_batch(self, sessions: List[Dict]) -> Dict[str, List[Dict]]:
+        """Extract concepts for several sessions with one model request
+
+        Returns concepts per session file; sessions the model skipped are
+        left out so the caller can fall back for just those.
+        """
+        system_prompt = """Extract key concepts from each CDCS session below.
+        Sessions are delimited by "=== DOCUMENT <n> ===" lines.
+        Focus on technical, domain and system concepts and their relationships.
         
         Output JSON:
         {
-            "concepts": [
+            "documents": [
                 {
-                    "name": "concept name",
-                    "type": "technical|domain|system",
-                    "description": "brief description",
-                    "related_to": ["other", "concepts"],
-                    "importance": 0.0-1.0
+                    "document": n,
+                    "concepts": [
+                        %s
+                    ]
                 }
             ]
         }
-        """
+        """ % CONCEPT_SCHEMA
         
-        prompt = f"Extract concepts from:\n{text[:2000]}"
+        prompt = "Extract concepts from:\n" + "\n".join(
+            f"=== DOCUMENT {i} ===\n{session['content'][:EXCERPT_CHARS]}"
+            for i, session in enumerate(sessions, 1)
+        )
         response = self.orchestrator.ollama_query(prompt, system_prompt)
+        self.extraction_stats['requests'] += 1
         
         try:
-            return json.loads(response).get('concepts', [])
+            documents = json.loads(response).get('documents', [])
         except:
-            # Fallback extraction
-            return self.fallback_concept_extraction(text)
-            
-    def fallback_concept_extraction(self, text: str) -> List[Dict]:
-        """Simple pattern-based concept extraction"""
-        concepts = []
-        
-        # Extract capitalized terms
-        import re
-        terms = re.findall(r'\b[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*\b', text)
-        
-        for term in set(terms):
-            if len(term) > 3:  # Skip short terms
-                concepts.append({
-                    "name": term,
-                    "type": "domain",
-                    "description": f"Mentioned in context",
-                    "related_to": [],
-                    "importance": 0.5
-                })
-                
-        return concepts[:20]  # Limit
-        
-    def build_knowledge_graph(self, sessions: List[Dict]) -> nx.DiGraph:
-        """Build knowledge graph from sessions"""
-        
-        for session in sessions:
-            # Extract concepts
-            concepts = self.extract_concepts(session['content'])
+            return {}
             
-            # Add nodes
-            for concept in concepts:
-                node_id = concept['name'].lower().replace(' ', '_')
-                
-                if node_id not in self.graph:
-                    self.graph.add_node(
-                        node_id,
-                        name=concept['name'],
-                        type=concept['type'],
-                        description=concept['description'],
-                        importance=concept['importance'],
-                        sessions=[session['file']],
-                        first_seen=session['file'],
-                        occurrence_count=1
-                    )
+        extracted = {}
+        for document in documents:
+            try:
+                session = sessions[int(document['document']) - 1]
+            except (KeyError, TypeError, ValueError, IndexError):
+                continue
+            extracted[session['file']] = document.get('concepts', [])
+        return extracted
+        
+    def fallback_concepts_from_counts(self, counts: Counter) -> List[Dict]:
+        """Most frequent capitalized terms as concepts"""
+        return [{
+            "name": term,
+            "type": "domain",
+            "description": "Mentioned in context",
+            "related_to": [],
+            "importance": 0.5
+        } for term, _ in counts.most_common(20)]
+        
+    def build_knowledge_graph(self, sessions: List[Dict]) -> ConceptGraph:
+        """Merge concepts from sessions not yet in the persisted graph, then load it"""
+        self.merged_sessions = self.store.pending(sessions)
+        fallback = []
+        
+        for index, batch in enumerate(self.iter_extraction_batches(self.merged_sessions)):
+            extracted = self.extract_concepts_batch(batch)
+            if not extracted and index == 0:
+                # Model unavailable or unusable: extract everything locally
+                fallback = self.merged_sessions
+                break
+            for session in batch:
+                if session['file'] in extracted:
+                    self.store.merge_session(session['file'], session.get('sha256'), extracted[session['file']])
                 else:
-                    # Update existing node
-                    self.graph.nodes[node_id]['occurrence_count'] += 1
-                    self.graph.nodes[node_id]['sessions'].append(session['file'])
-                    self.graph.nodes[node_id]['importance'] = max(
-                        self.graph.nodes[node_id]['importance'],
-                        concept['importance']
-                    )
+                    fallback.append(session)
                     
-                # Add edges
-                for related in concept.get('related_to', []):
-                    related_id = related.lower().replace(' ', '_')
-                    if related_id in self.graph:
-                        if self.graph.has_edge(node_id, related_id):
-                            self.graph[node_id][related_id]['weight'] += 1
-                        else:
-                            self.graph.add_edge(node_id, related_id, weight=1)
-                            
+        # One regex pass per document over every session the model missed
+        counts = corpus_term_frequencies([session['content'] for session in fallback])
+        for session, session_counts in zip(fallback, counts):
+            self.store.merge_session(session['file'], session.get('sha256'),
+                                     self.fallback_concepts_from_counts(session_counts))
+            
+        self.extraction_stats['documents'] += len(self.merged_sessions)
+        self.extraction_stats['fallback_documents'] += len(fallback)
+        self.graph = ConceptGraph.from_store(self.store)
         return self.graph
         
     def identify_concept_clusters(self) -> List[Set[str]]:
-        """Identify clusters of related concepts"""
+        """Identify clusters of related concepts by label propagation"""
+        return self.graph.clusters()
         
-        # Use community detection
-        try:
-            import community
-            partition = community.best_partition(self.graph.to_undirected())
-            
-            clusters = defaultdict(set)
-            for node, cluster_id in partition.items():
-                clusters[cluster_id].add(node)
-                
-            return list(clusters.values())
-        except:
-            # Fallback to connected components
-            return list(nx.weakly_connected_components(self.graph))
-            
     def synthesize_insights(self, clusters: List[Set[str]]) -> List[Dict]:
         """Generate insights from concept clusters"""
         insights = []
@@ -143,11 +164,11 @@ class KnowledgeSynthesizer:
             # Get cluster concepts
             cluster_concepts = []
             for node_id in cluster:
-                node_data = self.graph.nodes[node_id]
+                node_data = self.graph.node(node_id)
                 cluster_concepts.append({
                     'name': node_data['name'],
                     'type': node_data['type'],
-                    'importance': node_data['importance']
+                    'importance': float(node_data['importance'])
                 })
                 
             # Use ollama to synthesize insight
@@ -181,7 +202,7 @@ class KnowledgeSynthesizer:
                     'type': 'connection',
                     'confidence': 0.5,
                     'cluster_id': i,
-                    'concepts': [self.graph.nodes[n]['name'] for n in list(cluster)[:5]]
+                    'concepts': [self.graph.node(n)['name'] for n in list(cluster)[:5]]
                 })
                 
         return insights
@@ -190,69 +211,77 @@ class KnowledgeSynthesizer:
         """Identify gaps in knowledge graph"""
         gaps = []
         
-        # Find weakly connected nodes (potential gaps)
-        for node in self.graph.nodes():
-            in_degree = self.graph.in_degree(node)
-            out_degree = self.graph.out_degree(node)
+        # Weakly connected nodes (potential gaps), ranked before any model call
+        degree = self.graph.degree()
+        priority = self.graph.attributes['importance'] / (degree + 1)
+        candidates = np.flatnonzero(degree < 2)
+        top = candidates[np.argsort(-priority[candidates], kind='stable')[:10]]
+        
+        for i in top:
+            node_data = self.graph.node(self.graph.node_ids[i])
             
-            if in_degree + out_degree < 2:  # Isolated or weakly connected
-                node_data = self.graph.nodes[node]
-                
-                # Use ollama to identify what's missing
-                prompt = f"What knowledge would better connect '{node_data['name']}' ({node_data['description']}) to a broader system?"
-                
-                response = self.orchestrator.ollama_query(prompt, 
-                    "Suggest missing connections or knowledge gaps. Be specific and actionable."
-                )
-                
-                gaps.append({
-                    'concept': node_data['name'],
-                    'current_connections': in_degree + out_degree,
-                    'gap_analysis': response[:200],
-                    'priority': node_data['importance'] * (1 / (in_degree + out_degree + 1))
-                })
-                
-        return sorted(gaps, key=lambda x: x['priority'], reverse=True)[:10]
+            # Use ollama to identify what's missing
+            prompt = f"What knowledge would better connect '{node_data['name']}' ({node_data['description']}) to a broader system?"
+            
+            response = self.orchestrator.ollama_query(prompt, 
+                "Suggest missing connections or knowledge gaps. Be specific and actionable."
+            )
+            
+            gaps.append({
+                'concept': node_data['name'],
+                'current_connections': int(degree[i]),
+                'gap_analysis': response[:200],
+                'priority': float(priority[i])
+            })
+            
+        return gaps
         
     def generate_knowledge_map(self) -> Dict:
         """Generate visual knowledge map data"""
         
-        # Calculate layout
-        try:
-            pos = nx.spring_layout(self.graph, k=2, iterations=50)
-        except:
-            pos = {}
+        # Calculate layout (networkx is optional; fall back to a circle)
+        positions = None
+        if HAS_NETWORKX:
+            try:
+                pos = nx.spring_layout(self.graph.to_networkx(), k=2, iterations=50)
+                positions = np.array([pos[n] for n in self.graph.node_ids]).reshape(-1, 2)
+            except:
+                positions = None
+        if positions is None:
+            angles = 2 * np.pi * np.arange(len(self.graph)) / max(len(self.graph), 1)
+            positions = np.column_stack([np.cos(angles), np.sin(angles)])
             
         # Prepare node data
+        attributes = self.graph.attributes
+        sizes = np.log(attributes['occurrence_count'] + 1) * 10
         nodes = []
-        for node_id, (x, y) in pos.items():
-            node_data = self.graph.nodes[node_id]
+        for i, node_id in enumerate(self.graph.node_ids):
             nodes.append({
                 'id': node_id,
-                'x': float(x),
-                'y': float(y),
-                'name': node_data['name'],
-                'type': node_data['type'],
-                'size': np.log(node_data['occurrence_count'] + 1) * 10,
-                'importance': node_data['importance']
+                'x': float(positions[i, 0]),
+                'y': float(positions[i, 1]),
+                'name': attributes['name'][i],
+                'type': attributes['type'][i],
+                'size': float(sizes[i]),
+                'importance': float(attributes['importance'][i])
             })
             
         # Prepare edge data
         edges = []
-        for source, target, data in self.graph.edges(data=True):
+        for source, target, weight in zip(self.graph.sources, self.graph.indices, self.graph.weights):
             edges.append({
-                'source': source,
-                'target': target,
-                'weight': data.get('weight', 1)
+                'source': self.graph.node_ids[source],
+                'target': self.graph.node_ids[target],
+                'weight': float(weight)
             })
             
         return {
             'nodes': nodes,
             'edges': edges,
             'stats': {
-                'total_concepts': len(self.graph.nodes),
-                'total_connections': len(self.graph.edges),
-                'avg_connections': np.mean([self.graph.degree(n) for n in self.graph.nodes]) if self.graph.nodes else 0
+                'total_concepts': len(self.graph),
+                'total_connections': self.graph.num_edges,
+                'avg_connections': float(self.graph.degree().mean()) if len(self.graph) else 0
             }
         }
         
@@ -263,7 +292,7 @@ class KnowledgeSynthesizer:
         
         # Save knowledge graph
         graph_file = self.knowledge_path / f"knowledge_graph_{timestamp}.json"
-        nx.write_json_graph(self.graph, str(graph_file))
+        graph_file.write_text(json.dumps(self.graph.to_node_link()))
         
         # Save insights
         insights_file = self.knowledge_path / f"insights_{timestamp}.json"
@@ -301,8 +330,8 @@ class KnowledgeSynthesizer:
             
         # Build knowledge graph
         self.build_knowledge_graph(sessions)
-        metrics['concepts_extracted'] = len(self.graph.nodes)
-        metrics['tokens_processed'] = sum(len(s['content']) // 4 for s in sessions)
+        metrics['concepts_extracted'] = len(self.graph)
+        metrics['tokens_processed'] = sum(s['size'] // 4 for s in self.merged_sessions)
         
         # Identify clusters
         clusters = self.identify_concept_clusters()
@@ -324,8 +353,9 @@ class KnowledgeSynthesizer:
             'gaps': gaps,
             'knowledge_map': knowledge_map,
             'stats': {
-                'concepts': len(self.graph.nodes),
-                'connections': len(self.graph.edges),
+                'concepts': len(self.graph),
+                'connections': self.graph.num_edges,
+                'components': len(self.graph.connected_components()),
                 'clusters': len(clusters),
                 'largest_cluster': max(len(c) for c in clusters) if clusters else 0
             }
@@ -335,14 +365,16 @@ class KnowledgeSynthesizer:
         self.save_synthesis_results(results)
         
         metrics['metadata'] = {
+            'sessions_merged': len(self.merged_sessions),
+            'extraction': dict(self.extraction_stats),
+            'graph_store': self.store.stats(),
             'clusters_found': len(clusters),
             'avg_cluster_size': np.mean([len(c) for c in clusters]) if clusters else 0,
-            'graph_density': nx.density(self.graph) if len(self.graph) > 1 else 0,
-            'top_concepts': sorted(
-                [(n, self.graph.nodes[n]['occurrence_count']) for n in self.graph.nodes],
-                key=lambda x: x[1],
-                reverse=True
-            )[:10]
+            'graph_density': self.graph.density(),
+            'top_concepts': [
+                (self.graph.node_ids[i], int(self.graph.attributes['occurrence_count'][i]))
+                for i in np.argsort(-self.graph.attributes['occurrence_count'], kind='stable')[:10]
+            ]
         }
         
         return metrics
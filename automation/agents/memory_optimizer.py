@@ -6,24 +6,39 @@ Uses ollama/qwen3 for intelligent semantic compression
 
 import json
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from typing import Dict, List, Tuple
 import datetime
-import shutil
+
+from automation.chunk_store import ChunkStore, chunk_hash, content_defined_chunks
+from automation.session_archive import POINTER_MARKER, SessionArchive, entry_name
+from automation.text_stats import text_stats
 
 class MemoryOptimizer:
+    reads = {'sessions', 'discovered_patterns'}
+    writes = {'sessions', 'pattern_cache'}
+    
     def __init__(self, orchestrator):
         self.orchestrator = orchestrator
         self.task_description = "Optimizing memory through intelligent compression"
-        self.compressed_path = Path("/Users/sac/claude-desktop-context/memory/sessions/compressed")
+        self.sessions_path = Path("/Users/sac/claude-desktop-context/memory/sessions")
+        self.compressed_path = self.sessions_path / "compressed"
         self.compressed_path.mkdir(parents=True, exist_ok=True)
+        self.chunk_store = ChunkStore(self.compressed_path / "chunk_store.db")
+        self.archive = SessionArchive(self.compressed_path / "sessions.cdar")
+        # One in-flight LLM call per pooled client connection by default
+        self.compression_workers = int(os.environ.get(
+            "CDCS_COMPRESSION_WORKERS", orchestrator.llm.max_concurrency))
+        self.chunk_retries = int(os.environ.get("CDCS_CHUNK_RETRIES", "2"))
+        self.pipeline_stats = {'chunks': 0, 'reused': 0, 'compressed': 0, 'retries': 0, 'fallbacks': 0}
+        self._stats_lock = threading.Lock()
         
     def analyze_session_for_compression(self, session_path: Path) -> Dict:
         """Analyze if session needs compression"""
-        content = session_path.read_text()
-        lines = len(content.splitlines())
-        size_bytes = len(content.encode())
-        entropy = self.orchestrator.calculate_shannon_entropy(content)
+        entropy, lines, size_bytes = text_stats(session_path.read_bytes())
         
         # Compression criteria
         needs_compression = (
@@ -41,7 +56,7 @@ class MemoryOptimizer:
             'priority': entropy * (lines / 1000)  # Higher entropy + size = higher priority
         }
         
-    def spr_compress(self, content: str, ratio: int = 15) -> Dict:
+    def spr_compress(self, content: str, ratio: int = 15, session_name: str = None) -> Dict:
         """Semantic Pyramid Reduction compression using ollama"""
         
         system_prompt = f"""You are a Sparse Priming Representation (SPR) compressor.
@@ -68,57 +83,84 @@ class MemoryOptimizer:
         }}
         """
         
-        # Split content into chunks for ollama processing
-        chunks = self.split_content_intelligently(content, 2000)
-        compressed_chunks = []
-        
-        for i, chunk in enumerate(chunks):
-            prompt = f"SPR compress chunk {i+1}/{len(chunks)}:\n\n{chunk}"
-            response = self.orchestrator.ollama_query(prompt, system_prompt)
-            
-            try:
-                compressed_chunks.append(json.loads(response))
-            except:
-                # Fallback to basic compression
-                compressed_chunks.append({
-                    "summary": chunk[:200] + "...",
-                    "key_points": self.extract_key_points(chunk),
-                    "patterns": [],
-                    "decisions": [],
-                    "code_artifacts": self.extract_code_snippets(chunk)[:3],
-                    "reconstruction_triggers": self.extract_keywords(chunk)[:10]
-                })
+        # The same chunk compressed to a different ratio is a different entry
+        salt = f"ratio={ratio}\n"
+        
+        # Stream content-defined chunks through a bounded worker pool; the
+        # splitter pauses once 2x workers chunks are queued
+        max_in_flight = self.compression_workers * 2
+        order = []
+        results = {}
+        running = {}
+        agent = self.orchestrator.current_agent()
+        
+        with ThreadPoolExecutor(max_workers=self.compression_workers,
+                                thread_name_prefix="cdcs-spr") as executor:
+            for chunk in content_defined_chunks(content):
+                self.count('chunks')
+                key = chunk_hash(chunk, salt)
+                order.append((key, len(chunk)))
                 
-        # Merge compressed chunks
-        return self.merge_compressed_chunks(compressed_chunks)
-        
-    def split_content_intelligently(self, content: str, chunk_size: int) -> List[str]:
-        """Split content on semantic boundaries"""
-        lines = content.splitlines()
-        chunks = []
-        current_chunk = []
-        current_size = 0
-        
-        for line in lines:
-            # Look for semantic boundaries
-            is_boundary = (
-                line.startswith('#') or  # Headers
-                line.startswith('---') or  # Separators
-                line.strip() == '' and current_size > chunk_size * 0.8  # Paragraphs
-            )
-            
-            if is_boundary and current_size > chunk_size * 0.5:
-                chunks.append('\n'.join(current_chunk))
-                current_chunk = [line]
-                current_size = len(line)
-            else:
-                current_chunk.append(line)
-                current_size += len(line)
+                # Repeated within this session, or seen in any earlier one
+                if key in results or key in running.values():
+                    self.count('reused')
+                    continue
+                cached = self.chunk_store.get(key)
+                if cached is not None:
+                    self.count('reused')
+                    results[key] = cached
+                    continue
+                    
+                if len(running) >= max_in_flight:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[running.pop(future)] = future.result()
+                        
+                running[executor.submit(self.compress_chunk, chunk, key, system_prompt, agent)] = key
+                
+            for future, key in running.items():
+                results[key] = future.result()
                 
-        if current_chunk:
-            chunks.append('\n'.join(current_chunk))
+        if session_name:
+            self.chunk_store.record_session(session_name, order)
             
-        return chunks
+        # Merge each distinct chunk once, in order of first appearance
+        unique = dict.fromkeys(key for key, _ in order)
+        return self.merge_compressed_chunks([results[key] for key in unique])
+        
+    def count(self, stat: str):
+        with self._stats_lock:
+            self.pipeline_stats[stat] += 1
+            
+    def compress_chunk(self, chunk: str, key: str, system_prompt: str, agent: str = None) -> Dict:
+        """Compress one chunk, retrying malformed model output before falling back"""
+        prompt = f"SPR compress this chunk:\n\n{chunk}"
+        
+        with self.orchestrator.agent_scope(agent):
+            for attempt in range(self.chunk_retries + 1):
+                if attempt:
+                    self.count('retries')
+                # A cached response that failed to parse must not be served again
+                response = self.orchestrator.ollama_query(prompt, system_prompt, use_cache=attempt == 0)
+                try:
+                    compressed = json.loads(response)
+                except ValueError:
+                    continue
+                if isinstance(compressed, dict):
+                    self.chunk_store.put(key, len(chunk), compressed)
+                    self.count('compressed')
+                    return compressed
+                    
+        # Fallback to basic compression (not stored, so a later run retries the model)
+        self.count('fallbacks')
+        return {
+            "summary": chunk[:200] + "...",
+            "key_points": self.extract_key_points(chunk),
+            "patterns": [],
+            "decisions": [],
+            "code_artifacts": self.extract_code_snippets(chunk)[:3],
+            "reconstruction_triggers": self.extract_keywords(chunk)[:10]
+        }
         
     def extract_key_points(self, text: str) -> List[str]:
         """Extract key points using pattern matching"""
@@ -133,7 +175,6 @@ class MemoryOptimizer:
         
         for line in text.splitlines():
             for pattern in patterns:
-                import re
                 match = re.match(pattern, line, re.IGNORECASE)
                 if match:
                     key_points.append(match.group(1).strip())
@@ -143,7 +184,6 @@ class MemoryOptimizer:
         
     def extract_code_snippets(self, text: str) -> List[str]:
         """Extract important code snippets"""
-        import re
         code_blocks = re.findall(r'```[\w]*\n(.*?)\n```', text, re.DOTALL)
         
         # Prioritize by length and complexity
@@ -204,51 +244,55 @@ class MemoryOptimizer:
         
         return merged
         
-    def save_compressed_session(self, session_path: Path, compressed_data: Dict) -> Path:
-        """Save compressed session and archive original"""
-        # Create compressed filename
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        compressed_name = f"{session_path.stem}_compressed_{timestamp}.spr"
-        compressed_file = self.compressed_path / compressed_name
-        
-        # Add metadata
-        compressed_data['_metadata'] = {
-            'original_file': session_path.name,
-            'original_path': str(session_path),
-            'compression_date': datetime.datetime.now().isoformat(),
-            'compression_ratio': compressed_data['metadata']['original_lines'] / max(compressed_data['metadata']['compressed_lines'], 1)
-        }
-        
-        # Save compressed version
-        compressed_file.write_text(json.dumps(compressed_data, indent=2))
-        
-        # Archive original
-        archive_path = self.compressed_path / "originals"
-        archive_path.mkdir(exist_ok=True)
-        shutil.move(str(session_path), str(archive_path / session_path.name))
+    def save_compressed_sessions(self, compressed: List[Tuple[Path, Dict]]) -> List[Dict]:
+        """Archive originals and their SPR forms in one batch, leaving pointer files behind"""
+        compression_date = datetime.datetime.now()
+        items = []
+        pointers = []
         
-        # Create pointer file
-        pointer_content = f"COMPRESSED TO: {compressed_file.name}\n"
-        pointer_content += f"Compression ratio: {compressed_data['_metadata']['compression_ratio']:.1f}:1\n"
-        pointer_content += f"Date: {compressed_data['_metadata']['compression_date']}\n"
-        session_path.write_text(pointer_content)
-        
-        return compressed_file
+        for session_path, compressed_data in compressed:
+            original = session_path.read_bytes()
+            name = str(session_path.relative_to(self.sessions_path))
+            
+            # Add metadata
+            compressed_data['_metadata'] = {
+                'original_file': session_path.name,
+                'original_path': str(session_path),
+                'compression_date': compression_date.isoformat(),
+                'compression_ratio': compressed_data['metadata']['original_lines'] / max(compressed_data['metadata']['compressed_lines'], 1)
+            }
+            
+            # Both forms go into the archive: the original for exact recovery and
+            # the SPR for priming, whose entry records the original's size
+            spr_name = entry_name('spr', f"{session_path.stem}_compressed_{compression_date.strftime('%Y%m%d_%H%M%S')}.spr")
+            items.append((entry_name('session', name), original, {}))
+            items.append((spr_name, json.dumps(compressed_data, indent=2).encode(),
+                          {'kind': 'spr', 'session': session_path.name, 'original_size': len(original)}))
+            
+            pointer_content = f"{POINTER_MARKER.decode()}{self.archive.path.name}#{spr_name}\n"
+            pointer_content += f"Compression ratio: {compressed_data['_metadata']['compression_ratio']:.1f}:1\n"
+            pointer_content += f"Date: {compressed_data['_metadata']['compression_date']}\n"
+            pointers.append((session_path, pointer_content))
+            
+        # Originals are replaced only once the whole batch is durable
+        entries = self.archive.append_many(items)
+        for session_path, pointer_content in pointers:
+            session_path.write_text(pointer_content)
+            
+        return entries[1::2]
         
     def optimize_pattern_cache(self) -> Dict:
         """Optimize the pattern cache for quick access"""
         pattern_stats = {}
         
         # Analyze pattern usage
-        import sqlite3
-        conn = sqlite3.connect(self.orchestrator.db_path)
+        conn = self.orchestrator.db.connection()
         patterns = conn.execute("""
             SELECT pattern_hash, pattern_content, usage_count, confidence
             FROM discovered_patterns
             ORDER BY usage_count * confidence DESC
             LIMIT 100
         """).fetchall()
-        conn.close()
         
         # Create optimized cache
         cache_path = Path("/Users/sac/claude-desktop-context/patterns/cache")
@@ -294,10 +338,9 @@ class MemoryOptimizer:
         }
         
         # Find sessions needing compression
-        sessions_path = Path("/Users/sac/claude-desktop-context/memory/sessions")
         candidates = []
         
-        for session_file in sessions_path.glob("*.md"):
+        for session_file in self.sessions_path.glob("*.md"):
             analysis = self.analyze_session_for_compression(session_file)
             if analysis['needs_compression']:
                 candidates.append(analysis)
@@ -308,6 +351,7 @@ class MemoryOptimizer:
         # Compress top candidates
         total_original_size = 0
         total_compressed_size = 0
+        compressed_sessions = []
         
         for candidate in candidates[:3]:  # Limit to 3 per run
             session_path = candidate['path']
@@ -321,17 +365,15 @@ class MemoryOptimizer:
             else:
                 ratio = 10
                 
-            compressed = self.spr_compress(content, ratio)
-            compressed_file = self.save_compressed_session(session_path, compressed)
-            
-            original_size = candidate['size_bytes']
-            compressed_size = len(compressed_file.read_text().encode())
-            
-            total_original_size += original_size
-            total_compressed_size += compressed_size
+            compressed_sessions.append((session_path, self.spr_compress(content, ratio, session_path.name)))
             
-            metrics['sessions_compressed'] += 1
-            metrics['tokens_processed'] += original_size // 4
+        # One archive batch per run
+        if compressed_sessions:
+            for entry in self.save_compressed_sessions(compressed_sessions):
+                total_original_size += entry['original_size']
+                total_compressed_size += entry['size']
+                metrics['sessions_compressed'] += 1
+                metrics['tokens_processed'] += entry['original_size'] // 4
             
         # Calculate compression metrics
         if total_original_size > 0:
@@ -344,7 +386,10 @@ class MemoryOptimizer:
         metrics['metadata'] = {
             'candidates_found': len(candidates),
             'avg_entropy': sum(c['entropy'] for c in candidates) / len(candidates) if candidates else 0,
-            'pattern_cache': pattern_stats
+            'pattern_cache': pattern_stats,
+            'chunk_pipeline': dict(self.pipeline_stats),
+            'chunk_dedup': self.chunk_store.stats(),
+            'archive': self.archive.stats()
         }
         
         return metrics
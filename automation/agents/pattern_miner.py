@@ -7,17 +7,28 @@ Uses ollama/qwen3 for intelligent pattern recognition
 import json
 import re
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Set, Tuple
 import hashlib
 from collections import Counter
 import numpy as np
 
 class PatternMiner:
+    reads = {'sessions', 'discovered_patterns'}
+    writes = {'discovered_patterns', 'patterns_discovered'}
+    
     def __init__(self, orchestrator):
         self.orchestrator = orchestrator
         self.task_description = "Mining patterns from recent sessions"
         self.patterns_path = Path("/Users/sac/claude-desktop-context/patterns/discovered")
         self.patterns_path.mkdir(parents=True, exist_ok=True)
+        self.known_hashes = self.load_known_hashes()
+        
+    def load_known_hashes(self) -> Set[str]:
+        """Warm the set of pattern hashes already stored in the database"""
+        return {
+            row[0] for row in
+            self.orchestrator.db.query("SELECT pattern_hash FROM discovered_patterns")
+        }
         
     def extract_code_patterns(self, content: str) -> List[Dict]:
         """Extract recurring code patterns"""
@@ -91,42 +102,46 @@ class PatternMiner:
         pattern_str = f"{pattern['name']}:{pattern['category']}:{pattern['trigger']}"
         return hashlib.sha256(pattern_str.encode()).hexdigest()[:16]
         
-    def save_pattern(self, pattern: Dict) -> bool:
-        """Save discovered pattern to database and filesystem"""
-        pattern_hash = self.calculate_pattern_hash(pattern)
-        
-        # Check if pattern already exists
-        conn = self.orchestrator.db_path.parent / "cdcs_intelligence.db"
-        existing = self.orchestrator.ollama_query(
-            f"SELECT id FROM discovered_patterns WHERE pattern_hash = '{pattern_hash}'",
-            "Return 'exists' if found, 'new' if not"
-        )
-        
-        if 'new' in existing.lower():
-            # Save to database
-            import sqlite3
-            conn = sqlite3.connect(self.orchestrator.db_path)
-            conn.execute("""
-                INSERT INTO discovered_patterns 
-                (timestamp, pattern_hash, pattern_content, confidence, 
-                 information_gain, category)
-                VALUES (datetime('now'), ?, ?, ?, ?, ?)
-            """, (
+    def save_patterns(self, patterns: List[Dict]) -> int:
+        """Bulk upsert patterns; duplicates bump usage_count. Returns new count"""
+        rows = []
+        new_patterns = {}
+        
+        for pattern in patterns:
+            pattern_hash = self.calculate_pattern_hash(pattern)
+            if pattern_hash not in self.known_hashes:
+                new_patterns.setdefault(pattern_hash, pattern)
+            rows.append((
                 pattern_hash,
                 json.dumps(pattern),
                 pattern['confidence'],
                 self.calculate_information_gain(pattern),
                 pattern['category']
             ))
-            conn.commit()
-            conn.close()
             
-            # Save to filesystem
+        if not rows:
+            return 0
+            
+        self.orchestrator.db.executemany("""
+            INSERT INTO discovered_patterns 
+            (timestamp, pattern_hash, pattern_content, confidence, 
+             information_gain, category)
+            VALUES (datetime('now'), ?, ?, ?, ?, ?)
+            ON CONFLICT(pattern_hash) DO UPDATE SET usage_count = usage_count + 1,
+                                                    last_used = datetime('now')
+        """, rows)
+        self.known_hashes.update(new_patterns)
+        
+        # Write pattern files once the database transaction has committed
+        for pattern_hash, pattern in new_patterns.items():
             pattern_file = self.patterns_path / f"{pattern_hash}_{pattern['name']}.json"
             pattern_file.write_text(json.dumps(pattern, indent=2))
             
-            return True
-        return False
+        return len(new_patterns)
+        
+    def save_pattern(self, pattern: Dict) -> bool:
+        """Save discovered pattern to database and filesystem"""
+        return self.save_patterns([pattern]) == 1
         
     def calculate_information_gain(self, pattern: Dict) -> float:
         """Calculate information gain from pattern discovery"""
@@ -204,9 +219,7 @@ class PatternMiner:
         metrics['patterns_found'] += len(emergent_patterns)
         
         # Save new patterns
-        for pattern in interaction_patterns + emergent_patterns:
-            if self.save_pattern(pattern):
-                metrics['new_patterns'] += 1
+        metrics['new_patterns'] = self.save_patterns(interaction_patterns + emergent_patterns)
                 
         # Calculate pattern statistics
         function_counter = Counter()
@@ -5,20 +5,31 @@ Uses ollama/qwen3 for intelligent prediction of future needs
 """
 
 import json
+import re
 from pathlib import Path
 from typing import Dict, List, Tuple, Set
 import datetime
 import numpy as np
 from collections import defaultdict
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from automation.tfidf_store import TfidfStore
+from automation.preload_cache import PreloadCache
+from automation.pattern_catalog import shared_catalog
+from automation.transition_model import TransitionModel
 
 class PredictiveLoader:
+    reads = {'sessions', 'automation_runs', 'discovered_patterns', 'patterns_catalog'}
+    writes = {'preload_cache'}
+    
     def __init__(self, orchestrator):
         self.orchestrator = orchestrator
         self.task_description = "Predictive context preloading"
         self.cache_path = Path("/Users/sac/claude-desktop-context/cache")
         self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.tfidf = TfidfStore(self.cache_path / "tfidf.db")
+        self.preload_cache = PreloadCache(self.cache_path / "preload.cache")
+        self.catalog = shared_catalog()
+        self.pattern_transitions = TransitionModel(self.cache_path / "transitions" / "patterns", order=1)
         
     def analyze_temporal_patterns(self) -> Dict:
         """Analyze time-based usage patterns"""
@@ -30,8 +41,7 @@ class PredictiveLoader:
         }
         
         # Query historical data
-        import sqlite3
-        conn = sqlite3.connect(self.orchestrator.db_path)
+        conn = self.orchestrator.db.connection()
         
         # Get session timing data
         sessions = conn.execute("""
@@ -67,7 +77,6 @@ class PredictiveLoader:
                 'session': session_file
             })
             
-        conn.close()
         return temporal_patterns
         
     def predict_next_topics(self, recent_sessions: List[Dict]) -> List[Dict]:
@@ -99,6 +108,18 @@ class PredictiveLoader:
         }
         """
         
+        # Model-free predictions first: what usually follows the last pattern used,
+        # keyed like the model's training data (discovered_patterns names)
+        self.update_pattern_transitions()
+        last = self.pattern_transitions.meta.get('last')
+        likely_patterns = self.pattern_transitions.predict([last[1]] if last else [], 5)
+        transition_predictions = [{
+            'topic': pattern,
+            'confidence': score,
+            'reasoning': 'Frequently follows recently used patterns',
+            'resources_needed': [pattern]
+        } for pattern, score in likely_patterns]
+        
         # Prepare recent context
         recent_context = '\n\n'.join([
             f"Session {s['file']}:\n{s['content'][:500]}"
@@ -106,13 +127,16 @@ class PredictiveLoader:
         ])
         
         prompt = f"Predict next topics from:\n{recent_context}"
+        if likely_patterns:
+            prompt += "\n\nPatterns that usually come next: " + ', '.join(
+                f"{pattern} ({score:.2f})" for pattern, score in likely_patterns)
         response = self.orchestrator.ollama_query(prompt, system_prompt)
         
         try:
             predictions = json.loads(response).get('predictions', [])
             return predictions
         except:
-            return []
+            return transition_predictions
             
     def calculate_resource_similarity(self, sessions: List[Dict]) -> Dict[str, List[str]]:
         """Calculate similarity between sessions to predict resource needs"""
@@ -120,93 +144,104 @@ class PredictiveLoader:
         if len(sessions) < 2:
             return {}
             
-        # Extract text from sessions
-        texts = [s['content'] for s in sessions]
-        
-        # Create TF-IDF vectors
-        vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
-        try:
-            tfidf_matrix = vectorizer.fit_transform(texts)
-        except:
-            return {}
-            
-        # Calculate similarity matrix
-        similarity_matrix = cosine_similarity(tfidf_matrix)
+        # Only new or changed sessions touch the model; queries cover all history
+        self.tfidf.update(sessions)
         
-        # Find similar sessions and their resources
+        by_file = {s['file']: s for s in sessions}
         resource_predictions = {}
         
-        for i, session in enumerate(sessions):
-            similar_indices = np.argsort(similarity_matrix[i])[-5:-1][::-1]  # Top 4 similar
+        for session in sessions:
+            similar_files = [f for f, _ in self.tfidf.similar(session['file'], 4)]  # Top 4 similar
             
             similar_resources = set()
-            for idx in similar_indices:
-                if idx < len(sessions):
-                    # Extract resources mentioned in similar session
-                    similar_content = sessions[idx]['content']
-                    
-                    # Look for pattern references
-                    import re
-                    patterns = re.findall(r'patterns/catalog/(\w+)', similar_content)
-                    similar_resources.update(patterns)
-                    
-                    # Look for file references
-                    files = re.findall(r'/Users/sac/claude-desktop-context/(\S+)', similar_content)
-                    similar_resources.update(files[:5])  # Limit
-                    
+            for similar_file in similar_files:
+                # Extract resources mentioned in similar session
+                similar_content = self.session_content(similar_file, by_file)
+                
+                # Look for pattern references
+                patterns = re.findall(r'patterns/catalog/(\w+)', similar_content)
+                similar_resources.update(patterns)
+                
+                # Look for file references
+                files = re.findall(r'/Users/sac/claude-desktop-context/(\S+)', similar_content)
+                similar_resources.update(files[:5])  # Limit
+                
             resource_predictions[session['file']] = list(similar_resources)
             
         return resource_predictions
         
-    def identify_pattern_sequences(self) -> List[Dict]:
-        """Identify common sequences of pattern applications"""
-        
-        sequences = []
+    def session_content(self, file: str, loaded: Dict[str, Dict]) -> str:
+        """Content of a session, reading older ones from disk when still present"""
+        if file in loaded:
+            return loaded[file]['content']
+        path = self.orchestrator.session_manifest.sessions_path / file
+        try:
+            return path.read_text()
+        except (OSError, UnicodeDecodeError):
+            return ""
+            
+    def update_pattern_transitions(self) -> int:
+        """Count transitions between pattern uses recorded since the last update
+
+        Uses are ordered by last_used, which the pattern upsert sets whenever
+        usage_count goes up, so a pattern first used long after it was
+        inserted is still seen.
+        """
         
-        # Query pattern usage sequences
-        import sqlite3
-        conn = sqlite3.connect(self.orchestrator.db_path)
+        conn = self.orchestrator.db.connection()
+        meta = self.pattern_transitions.meta
         
-        # Get pattern usage history
-        pattern_usage = conn.execute("""
-            SELECT timestamp, pattern_hash, 
-                   json_extract(pattern_content, '$.name') as pattern_name
+        # Rows from the watermark on, minus those already counted at the watermark
+        # timestamp itself; the last one seen links to the next run
+        watermark = meta.get('watermark', '')
+        counted = set(meta.get('counted', []))
+        pattern_usage = [row for row in conn.execute("""
+            SELECT id, last_used, json_extract(pattern_content, '$.name') as pattern_name
             FROM discovered_patterns
-            WHERE usage_count > 0
-            ORDER BY timestamp
-        """).fetchall()
-        
-        # Build sequence map
-        sequence_map = defaultdict(list)
+            WHERE usage_count > 0 AND last_used >= ?
+            ORDER BY last_used, id
+        """, (watermark,)) if row[0] not in counted]
         
-        for i in range(len(pattern_usage) - 1):
-            current = pattern_usage[i]
-            next_pattern = pattern_usage[i + 1]
+        if not pattern_usage:
+            return 0
             
-            # Check if patterns used within same session (1 hour window)
-            current_time = datetime.datetime.fromisoformat(current[0])
-            next_time = datetime.datetime.fromisoformat(next_pattern[0])
+        added = 0
+        previous = meta.get('last')
+        for _, timestamp, pattern_name in pattern_usage:
+            if pattern_name is None:
+                continue
+            current_time = datetime.datetime.fromisoformat(timestamp)
+            # Patterns used within the same session (1 hour window) form a sequence
+            if previous and (current_time - datetime.datetime.fromisoformat(previous[0])).total_seconds() < 3600:
+                self.pattern_transitions.add([previous[1]], pattern_name)
+                added += 1
+            previous = [timestamp, pattern_name]
             
-            if (next_time - current_time).total_seconds() < 3600:  # Within 1 hour
-                sequence_map[current[2]].append(next_pattern[2])
-                
+        latest = pattern_usage[-1][1]
+        at_latest = [row_id for row_id, timestamp, _ in pattern_usage if timestamp == latest]
+        meta['counted'] = at_latest + (sorted(counted) if latest == watermark else [])
+        meta['watermark'] = latest
+        meta['last'] = previous
+        self.pattern_transitions.save()
+        return added
+        
+    def identify_pattern_sequences(self) -> List[Dict]:
+        """Identify common sequences of pattern applications"""
+        
+        sequences = []
+        self.update_pattern_transitions()
+        
         # Find frequent sequences
-        for pattern, next_patterns in sequence_map.items():
-            if len(next_patterns) >= 2:  # At least 2 occurrences
-                pattern_counter = defaultdict(int)
-                for p in next_patterns:
-                    pattern_counter[p] += 1
+        for (pattern,) in self.pattern_transitions.iter_contexts(1):
+            for next_pattern, count, confidence in self.pattern_transitions.successors([pattern]):
+                if count >= 2:  # At least 2 occurrences
+                    sequences.append({
+                        'first': pattern,
+                        'second': next_pattern,
+                        'frequency': count,
+                        'confidence': confidence
+                    })
                     
-                for next_pattern, count in pattern_counter.items():
-                    if count >= 2:
-                        sequences.append({
-                            'first': pattern,
-                            'second': next_pattern,
-                            'frequency': count,
-                            'confidence': count / len(next_patterns)
-                        })
-                        
-        conn.close()
         return sequences
         
     def build_prediction_model(self, temporal_patterns: Dict, topic_predictions: List[Dict]) -> Dict:
@@ -260,13 +295,14 @@ class PredictiveLoader:
         
         # Preload patterns from sequential predictions
         for sequence in model['sequential'].get('pattern_sequences', []):
-            pattern_file = Path(f"/Users/sac/claude-desktop-context/patterns/catalog/{sequence['second']}.md")
-            if pattern_file.exists():
+            pattern_path = self.catalog.find(sequence['second'])
+            if pattern_path:
+                pattern_file = Path(pattern_path)
                 content = pattern_file.read_text()
                 preloaded['patterns'].append({
                     'name': sequence['second'],
                     'trigger': sequence['first'],
-                    'content': content[:500],  # Summary
+                    'content': content,
                     'confidence': sequence['confidence']
                 })
                 
@@ -279,6 +315,7 @@ class PredictiveLoader:
                         preloaded['files'].append({
                             'path': str(file_path),
                             'topic': topic['topic'],
+                            'confidence': topic.get('confidence', 0.5),
                             'size': file_path.stat().st_size
                         })
                         
@@ -297,7 +334,7 @@ class PredictiveLoader:
         return preloaded
         
     def optimize_cache(self, preloaded: Dict) -> Dict:
-        """Optimize cache for quick access"""
+        """Stage predictions in the preload cache and evict by value per byte"""
         
         cache_stats = {
             'total_size': 0,
@@ -306,37 +343,29 @@ class PredictiveLoader:
             'optimization_ratio': 0.0
         }
         
-        # Create optimized cache file
-        cache_data = {
-            'timestamp': datetime.datetime.now().isoformat(),
-            'preloaded': preloaded,
-            'index': {
-                'patterns': {},
-                'files': {},
-                'topics': {}
-            }
-        }
-        
-        # Build indices for O(1) lookup
+        # Scores are prediction confidences; eviction weighs them by entry size
         for pattern in preloaded['patterns']:
-            cache_data['index']['patterns'][pattern['name']] = pattern
+            self.preload_cache.put(f"pattern:{pattern['name']}", pattern['content'], pattern['confidence'])
             cache_stats['pattern_count'] += 1
             
         for file_info in preloaded['files']:
-            cache_data['index']['files'][file_info['path']] = file_info
+            if file_info['size'] > self.preload_cache.disk_bytes:
+                continue
+            try:
+                content = Path(file_info['path']).read_bytes()
+            except:
+                continue
+            self.preload_cache.put(f"file:{file_info['path']}", content, file_info['confidence'])
             cache_stats['file_count'] += 1
-            cache_stats['total_size'] += file_info['size']
             
-        # Save cache
-        cache_file = self.cache_path / f"predictive_cache_{datetime.datetime.now().strftime('%Y%m%d_%H')}.json"
-        cache_file.write_text(json.dumps(cache_data, indent=2))
-        
-        # Update current cache pointer
-        current_cache = self.cache_path / "current.json"
-        current_cache.write_text(json.dumps({
-            'cache_file': str(cache_file),
-            'stats': cache_stats
-        }, indent=2))
+        max_frequency = max((k['frequency'] for k in preloaded['knowledge']), default=1)
+        for knowledge in preloaded['knowledge']:
+            self.preload_cache.put(f"knowledge:{knowledge['category']}", json.dumps(knowledge),
+                                   knowledge['frequency'] / max_frequency)
+            
+        cache_stats.update(self.preload_cache.commit())
+        cache_stats['total_size'] = cache_stats['bytes']
+        cache_stats['hourly_files_removed'] = self.collect_hourly_caches()
         
         # Calculate optimization ratio
         if cache_stats['total_size'] > 0:
@@ -346,6 +375,17 @@ class PredictiveLoader:
             
         return cache_stats
         
+    def collect_hourly_caches(self) -> int:
+        """Remove the hourly JSON caches (and their pointer) the preload cache replaced"""
+        removed = 0
+        for path in list(self.cache_path.glob("predictive_cache_*.json")) + [self.cache_path / "current.json"]:
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+        
     def generate_preload_recommendations(self, model: Dict) -> List[Dict]:
         """Generate specific preload recommendations"""
         
@@ -409,7 +449,7 @@ class PredictiveLoader:
         if recent_sessions:
             topic_predictions = self.predict_next_topics(recent_sessions)
             metrics['predictions_made'] += len(topic_predictions)
-            metrics['tokens_processed'] += sum(len(s['content']) // 4 for s in recent_sessions[:3])
+            metrics['tokens_processed'] += sum(s['size'] // 4 for s in recent_sessions[:3])
             
         # Calculate resource similarity
         resource_predictions = self.calculate_resource_similarity(recent_sessions)
@@ -437,6 +477,8 @@ class PredictiveLoader:
             'topic_predictions': len(topic_predictions),
             'pattern_sequences': len(model['sequential'].get('pattern_sequences', [])),
             'cache_size_kb': cache_stats['total_size'] / 1024,
+            'cache_entries': cache_stats['entries'],
+            'cache_evicted': cache_stats['evicted'],
             'top_predictions': [
                 {'topic': t['topic'], 'confidence': t['confidence']}
                 for t in topic_predictions[:3]
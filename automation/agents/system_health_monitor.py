@@ -14,6 +14,9 @@ import numpy as np
 from collections import deque
 
 class SystemHealthMonitor:
+    reads = {'sessions', 'automation_runs', 'discovered_patterns'}
+    writes = {'health'}
+    
     def __init__(self, orchestrator):
         self.orchestrator = orchestrator
         self.task_description = "Monitoring system health"
@@ -88,8 +91,7 @@ class SystemHealthMonitor:
         }
         
         # Analyze session memory patterns
-        import sqlite3
-        conn = sqlite3.connect(self.orchestrator.db_path)
+        conn = self.orchestrator.db.connection()
         
         # Get memory-related metrics
         memory_metrics = conn.execute("""
@@ -116,7 +118,6 @@ class SystemHealthMonitor:
                 'reason': 'Memory pressure exceeds threshold'
             })
             
-        conn.close()
         return memory_stats
         
     def detect_performance_anomalies(self) -> List[Dict]:
@@ -125,8 +126,7 @@ class SystemHealthMonitor:
         anomalies = []
         
         # Get recent performance metrics
-        import sqlite3
-        conn = sqlite3.connect(self.orchestrator.db_path)
+        conn = self.orchestrator.db.connection()
         
         # Compare recent vs historical performance
         recent_metrics = conn.execute("""
@@ -199,7 +199,6 @@ class SystemHealthMonitor:
             except:
                 pass
                 
-        conn.close()
         return anomalies
         
     def check_pattern_health(self) -> Dict:
@@ -213,8 +212,7 @@ class SystemHealthMonitor:
             'unused_patterns': []
         }
         
-        import sqlite3
-        conn = sqlite3.connect(self.orchestrator.db_path)
+        conn = self.orchestrator.db.connection()
         
         # Get pattern statistics
         pattern_stats = conn.execute("""
@@ -271,7 +269,6 @@ class SystemHealthMonitor:
             except:
                 pass
                 
-        conn.close()
         return pattern_health
         
     def analyze_error_logs(self) -> Dict:
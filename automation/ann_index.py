@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+ANN Index - Inverted-file (IVF) approximate nearest-neighbour search
+Vectors sit in a SessionVectorStore memmap; k-means centroids partition them
+into lists and a query only scans the nprobe closest lists
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from automation.session_vectors import SessionVectorStore, normalize
+
+# Below this size a brute-force scan is both exact and fast
+MIN_TRAIN_SIZE = 256
+KMEANS_ITERATIONS = 10
+DEFAULT_NPROBE = 8
+
+INDEX_ROOT = Path("/Users/sac/claude-desktop-context/memory/index")
+
+TOKEN = re.compile(r'[a-z0-9_]{3,}')
+
+
+def hash_embedding(text: str, dim: int = 256) -> np.ndarray:
+    """Signed feature-hashing bag-of-words embedding (log term frequency)"""
+    vector = np.zeros(dim, dtype=np.float32)
+    tokens = TOKEN.findall(text.lower())
+    if not tokens:
+        return vector
+    hashes = np.fromiter((zlib.crc32(t.encode()) for t in tokens), dtype=np.uint32, count=len(tokens))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, (hashes % dim).astype(np.int64), signs)
+    return np.sign(vector) * np.log1p(np.abs(vector))
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids of unit vectors"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        empty = np.bincount(assignments, minlength=k) == 0
+        # Re-seed empty lists so every centroid keeps a share of the data
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Persistent IVF index with incremental inserts
+
+    Files in the index directory: vectors.npy/.json (the vector store),
+    keys.txt (one key per row, appended), assignments.i32 (list of each
+    row, appended) and centroids.npy (rewritten when retrained). The index
+    retrains whenever it has doubled since the last training, so lists stay
+    balanced at an amortized constant cost per insert.
+    """
+
+    def __init__(self, directory: Path, dim: int = 256, nprobe: int = DEFAULT_NPROBE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.nprobe = nprobe
+        self.store = SessionVectorStore(self.directory / "vectors.npy", dim=dim)
+        self.dim = self.store.dim
+        self.keys_path = self.directory / "keys.txt"
+        self.assignments_path = self.directory / "assignments.i32"
+        self.centroids_path = self.directory / "centroids.npy"
+
+        self.keys = self.keys_path.read_text().splitlines() if self.keys_path.exists() else []
+        del self.keys[len(self.store):]  # Rows beyond the store's count never completed
+        self.centroids = np.load(self.centroids_path) if self.centroids_path.exists() else None
+        self.assignments = (np.fromfile(self.assignments_path, dtype=np.int32)[:len(self.store)]
+                            if self.assignments_path.exists() else np.empty(0, dtype=np.int32))
+        if self.centroids is not None and len(self.assignments) != len(self.store):
+            self.train()
+
+        # A re-added key supersedes its earlier rows
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.live = np.zeros(len(self.keys), dtype=bool)
+        self.live[list(self.rows.values())] = True
+        self._lists = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def extend(self, vectors: Iterable, keys: Optional[List[str]] = None) -> range:
+        """Insert vectors (keys default to their row numbers); returns their rows"""
+        vectors = list(vectors)
+        rows = self.store.extend(vectors)
+        keys = [str(row) for row in rows] if keys is None else [str(k) for k in keys]
+
+        with open(self.keys_path, 'a') as f:
+            f.write(''.join(f"{key}\n" for key in keys))
+        self.keys.extend(keys)
+        self.live = np.concatenate([self.live, np.ones(len(keys), dtype=bool)])
+        for key, row in zip(keys, rows):
+            if key in self.rows:
+                self.live[self.rows[key]] = False
+            self.rows[key] = row
+
+        if len(self.store) >= MIN_TRAIN_SIZE and len(self.store) >= 2 * self._trained_size():
+            self.train()
+        elif self.trained:
+            assigned = np.argmax(self.store.vectors[rows.start:rows.stop] @ self.centroids.T, axis=1)
+            self.assignments = np.concatenate([self.assignments, assigned.astype(np.int32)])
+            with open(self.assignments_path, 'ab') as f:
+                assigned.astype(np.int32).tofile(f)
+            self._lists = None
+        return rows
+
+    def add(self, vector, key: Optional[str] = None) -> int:
+        return self.extend([vector], None if key is None else [key])[0]
+
+    append = add
+
+    def _trained_size(self) -> int:
+        meta_path = self.directory / "ivf.json"
+        return json.loads(meta_path.read_text())['trained_size'] if meta_path.exists() else 0
+
+    def train(self):
+        """(Re)build centroids and list assignments from every stored vector"""
+        vectors = self.store.vectors
+        nlist = max(1, int(np.sqrt(len(vectors))))
+        self.centroids = kmeans(np.asarray(vectors), nlist)
+        self.assignments = np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+        np.save(self.centroids_path, self.centroids)
+        tmp_path = self.assignments_path.with_suffix('.tmp')
+        self.assignments.tofile(tmp_path)
+        os.replace(tmp_path, self.assignments_path)
+        (self.directory / "ivf.json").write_text(json.dumps({'trained_size': len(vectors), 'nlist': nlist}))
+        self._lists = None
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows grouped by list, and each list's offsets into that ordering"""
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind='stable')
+            offsets = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, offsets)
+        return self._lists
+
+    def search(self, query, k: int = 10, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, cosine similarities) of approximately the k nearest live vectors"""
+        if not len(self) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = self.store.fit([query])[0]
+
+        if not self.trained:
+            candidates = np.flatnonzero(self.live)
+        else:
+            order, offsets = self._inverted_lists()
+            probe = min(nprobe or self.nprobe, len(self.centroids))
+            lists = np.argpartition(-(self.centroids @ query), probe - 1)[:probe]
+            candidates = np.concatenate([order[offsets[c]:offsets[c + 1]] for c in lists])
+            candidates = candidates[self.live[candidates]]
+
+        similarities = self.store.matrix[candidates] @ query
+        if k < len(candidates):
+            best = np.argpartition(-similarities, k - 1)[:k]
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.argsort(-similarities[best], kind='stable')]
+        return candidates[best], similarities[best]
+
+    top_k = search
+
+    def search_keys(self, query, k: int = 10, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        rows, scores = self.search(query, k, nprobe)
+        return [(self.keys[row], float(score)) for row, score in zip(rows, scores)]
+
+    def brute_force(self, query, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact search over every live vector (baseline for the benchmark)"""
+        similarities = self.store.vectors @ self.store.fit([query])[0]
+        similarities[~self.live] = -np.inf
+        k = min(k, len(self))
+        best = np.argpartition(-similarities, k - 1)[:k]
+        best = best[np.argsort(-similarities[best], kind='stable')]
+        return best, similarities[best]
+
+def benchmark(count: int = 50000, dim: int = 128, queries: int = 200, k: int = 10):
+    """Recall@k and latency of IVF search against brute force on clustered data"""
+    import tempfile
+
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(64, dim))
+    data = centers[rng.integers(0, 64, count)] + rng.normal(scale=0.6, size=(count, dim))
+    probes = centers[rng.integers(0, 64, queries)] + rng.normal(scale=0.6, size=(queries, dim))
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = IVFIndex(Path(directory), dim=dim)
+        start = time.perf_counter()
+        index.extend(data)
+        print(f"=== IVF Benchmark ({count} x {dim}, k={k}) ===")
+        print(f"Build: {time.perf_counter() - start:.2f}s, {len(index.centroids)} lists")
+
+        start = time.perf_counter()
+        exact = [set(index.brute_force(q, k)[0].tolist()) for q in probes]
+        brute_ms = (time.perf_counter() - start) * 1000 / queries
+        print(f"Brute force:  {brute_ms:7.3f} ms/query  recall=1.000")
+
+        for nprobe in (1, 2, 4, 8, 16, 32):
+            start = time.perf_counter()
+            found = [set(index.search(q, k, nprobe)[0].tolist()) for q in probes]
+            ivf_ms = (time.perf_counter() - start) * 1000 / queries
+            recall = np.mean([len(f & e) / k for f, e in zip(found, exact)])
+            print(f"nprobe={nprobe:<3}    {ivf_ms:7.3f} ms/query  recall={recall:.3f}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -5,128 +5,97 @@ Uses ollama/qwen3 for autonomous pattern discovery and system optimization
 """
 
 import json
-import subprocess
 import datetime
 import os
 import sys
 import hashlib
-import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any
 import numpy as np
-from collections import defaultdict
 
 # Add parent directory to Python path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from automation.llm_client import OllamaClient, LLMClientError
+from automation.llm_cache import LLMResponseCache
+from automation.chunk_store import ChunkStore
+from automation.session_archive import SessionArchive
+from automation.agent_scheduler import AgentScheduler
+from automation.session_manifest import SessionManifest, SessionRecord
+from automation.text_stats import shannon_entropy
+from automation.intelligence_db import IntelligenceDB
+
 class CDCSOrchestrator:
     def __init__(self):
         self.base_path = Path("/Users/sac/claude-desktop-context")
         self.automation_path = self.base_path / "automation"
         self.db_path = self.automation_path / "cdcs_intelligence.db"
         self.model = "qwen3:latest"
+        self.llm = OllamaClient(model=self.model)
+        self.llm_cache = LLMResponseCache(self.automation_path / "cache" / "llm")
+        self._agent_context = threading.local()  # Which agent is issuing queries
+        self.session_manifest = SessionManifest(
+            self.base_path / "memory" / "sessions",
+            self.automation_path / "cache" / "session_manifest.json"
+        )
         self.init_database()
         
     def init_database(self):
         """Initialize SQLite database for tracking automation metrics"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS automation_runs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                agent TEXT,
-                task TEXT,
-                tokens_processed INTEGER,
-                patterns_found INTEGER,
-                compression_achieved REAL,
-                evolution_score REAL,
-                metadata TEXT
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS discovered_patterns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                pattern_hash TEXT UNIQUE,
-                pattern_content TEXT,
-                confidence REAL,
-                usage_count INTEGER DEFAULT 0,
-                information_gain REAL,
-                category TEXT
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS system_metrics (
-                timestamp TEXT PRIMARY KEY,
-                context_efficiency REAL,
-                pattern_hit_rate REAL,
-                compression_ratio REAL,
-                evolution_velocity REAL,
-                knowledge_retention REAL
-            )
-        """)
-        conn.commit()
-        conn.close()
+        self.db = IntelligenceDB(self.db_path)
         
-    def ollama_query(self, prompt: str, system_prompt: str = "") -> str:
-        """Query ollama with structured prompts"""
-        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+    def current_agent(self):
+        """Name of the agent issuing queries on this thread, if any"""
+        return getattr(self._agent_context, 'agent', None)
         
-        cmd = [
-            "ollama", "run", self.model,
-            "--format", "json",
-            full_prompt
-        ]
+    @contextmanager
+    def agent_scope(self, agent_name: str):
+        """Attribute this thread's queries to agent_name (e.g. in worker pools)"""
+        previous = self.current_agent()
+        self._agent_context.agent = agent_name
+        try:
+            yield
+        finally:
+            self._agent_context.agent = previous
+            
+    def ollama_query(self, prompt: str, system_prompt: str = "", use_cache: bool = True) -> str:
+        """Query ollama with structured prompts, serving repeats from the cache"""
+        agent = self.current_agent()
+        key = self.llm_cache.make_key(self.model, system_prompt, prompt)
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.stdout.strip()
+        if use_cache:
+            cached = self.llm_cache.get(key, agent)
+            if cached is not None:
+                return cached
+            
+        try:
+            response = self.llm.generate(prompt, system=system_prompt, format="json")
+        except LLMClientError as e:
+            print(f"[{datetime.datetime.now()}] ollama query failed: {e}")
+            return ""
+            
+        if response:
+            self.llm_cache.put(key, response, agent, self.model)
+        return response
         
     def calculate_shannon_entropy(self, text: str) -> float:
         """Calculate Shannon entropy of text"""
-        if not text:
-            return 0.0
+        return shannon_entropy(text)
         
-        freq = defaultdict(int)
-        for char in text:
-            freq[char] += 1
-            
-        entropy = 0.0
-        total = len(text)
-        for count in freq.values():
-            probability = count / total
-            if probability > 0:
-                entropy -= probability * np.log2(probability)
-                
-        return entropy
+    def iter_recent_sessions(self, hours: int = 24) -> Iterator[SessionRecord]:
+        """Stream recent session records; file content is read only on access"""
+        cutoff_time = datetime.datetime.now() - datetime.timedelta(hours=hours)
+        self.session_manifest.refresh()
+        return self.session_manifest.iter_sessions(since=cutoff_time.timestamp())
         
     def get_recent_sessions(self, hours: int = 24) -> List[Dict]:
         """Retrieve recent session data for analysis"""
-        sessions = []
-        sessions_path = self.base_path / "memory" / "sessions"
-        
-        cutoff_time = datetime.datetime.now() - datetime.timedelta(hours=hours)
+        return list(self.iter_recent_sessions(hours))
         
-        for session_file in sessions_path.glob("*.md"):
-            if session_file.stat().st_mtime > cutoff_time.timestamp():
-                content = session_file.read_text()
-                sessions.append({
-                    'file': session_file.name,
-                    'content': content,
-                    'entropy': self.calculate_shannon_entropy(content),
-                    'lines': len(content.splitlines())
-                })
-                
-        return sorted(sessions, key=lambda x: x['file'], reverse=True)
-        
-    def log_run(self, agent: str, task: str, metrics: Dict):
-        """Log automation run to database"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
-            INSERT INTO automation_runs 
-            (timestamp, agent, task, tokens_processed, patterns_found, 
-             compression_achieved, evolution_score, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+    def _run_row(self, agent: str, task: str, metrics: Dict) -> tuple:
+        return (
             datetime.datetime.now().isoformat(),
             agent,
             task,
@@ -134,10 +103,21 @@ class CDCSOrchestrator:
             metrics.get('patterns_found', 0),
             metrics.get('compression_achieved', 0.0),
             metrics.get('evolution_score', 0.0),
-            json.dumps(metrics.get('metadata', {}))
-        ))
-        conn.commit()
-        conn.close()
+            json.dumps(metrics.get('metadata', {}), default=str)
+        )
+        
+    def log_runs(self, runs: List[tuple]):
+        """Log several (agent, task, metrics) runs in one batched write"""
+        self.db.executemany("""
+            INSERT INTO automation_runs 
+            (timestamp, agent, task, tokens_processed, patterns_found, 
+             compression_achieved, evolution_score, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [self._run_row(agent, task, metrics) for agent, task, metrics in runs])
+        
+    def log_run(self, agent: str, task: str, metrics: Dict):
+        """Log automation run to database"""
+        self.log_runs([(agent, task, metrics)])
         
     def update_system_metrics(self):
         """Calculate and store current system metrics"""
@@ -150,24 +130,18 @@ class CDCSOrchestrator:
             'knowledge_retention': self.calculate_knowledge_retention()
         }
         
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
+        self.db.execute("""
             INSERT OR REPLACE INTO system_metrics VALUES (?, ?, ?, ?, ?, ?)
         """, tuple(metrics.values()))
-        conn.commit()
-        conn.close()
         
         return metrics
         
     def calculate_context_efficiency(self) -> float:
         """Calculate how efficiently context is being used"""
         # Analyze recent sessions for token usage vs task complexity
-        sessions = self.get_recent_sessions(24)
-        if not sessions:
-            return 0.0
-            
+        # (manifest statistics only - no session content is read here)
         efficiency_scores = []
-        for session in sessions:
+        for session in self.iter_recent_sessions(24):
             # Higher entropy with fewer lines = more efficient
             if session['lines'] > 0:
                 efficiency = session['entropy'] / np.log2(session['lines'] + 1)
@@ -177,14 +151,12 @@ class CDCSOrchestrator:
         
     def calculate_pattern_hit_rate(self) -> float:
         """Calculate how often patterns are successfully applied"""
-        conn = sqlite3.connect(self.db_path)
-        result = conn.execute("""
+        result = self.db.query_one("""
             SELECT AVG(CAST(usage_count AS FLOAT) / 
                       (julianday('now') - julianday(timestamp) + 1))
             FROM discovered_patterns
             WHERE confidence > 0.7
-        """).fetchone()
-        conn.close()
+        """)
         
         return result[0] if result[0] else 0.0
         
@@ -196,28 +168,49 @@ class CDCSOrchestrator:
             
         total_original = 0
         total_compressed = 0
+        chunked = set()
         
+        # Chunked sessions: every referenced byte counts as original, but a
+        # chunk shared across sessions is stored (and counted) only once
+        chunk_db = compressed_path / "chunk_store.db"
+        if chunk_db.exists():
+            store = ChunkStore(chunk_db)
+            chunk_stats = store.stats()
+            chunked = set(store.sessions())
+            store.close()
+            total_original += chunk_stats['stored_logical_bytes']
+            total_compressed += chunk_stats['stored_compressed_bytes']
+            
+        # Remaining SPR sessions come straight from the archive index
+        archive_path = compressed_path / "sessions.cdar"
+        if archive_path.exists():
+            archive = SessionArchive(archive_path)
+            for entry in archive.entries(kind="spr").values():
+                if entry.get('session') not in chunked:
+                    total_original += entry['original_size']
+                    total_compressed += entry['size']
+            archive.close()
+            
+        # SPR files written before the archive existed, next to their moved originals
         for compressed_file in compressed_path.glob("*.spr"):
-            # SPR files contain metadata about original size
             content = compressed_file.read_text()
-            if "original_size:" in content:
-                original_line = [l for l in content.splitlines() if l.startswith("original_size:")][0]
-                original_size = int(original_line.split(":")[1].strip())
-                compressed_size = len(content)
-                total_original += original_size
-                total_compressed += compressed_size
+            try:
+                original = compressed_path / "originals" / json.loads(content)['_metadata']['original_file']
+                original_size = original.stat().st_size
+            except (ValueError, KeyError, TypeError, OSError):
+                continue
+            total_original += original_size
+            total_compressed += len(content)
                 
         return total_original / total_compressed if total_compressed > 0 else 1.0
         
     def calculate_evolution_velocity(self) -> float:
         """Calculate rate of system improvement"""
-        conn = sqlite3.connect(self.db_path)
-        result = conn.execute("""
+        result = self.db.query_one("""
             SELECT COUNT(*) / (julianday('now') - julianday(MIN(timestamp)) + 1)
             FROM automation_runs
             WHERE evolution_score > 0.2
-        """).fetchone()
-        conn.close()
+        """)
         
         return result[0] if result[0] else 0.0
         
@@ -225,15 +218,23 @@ class CDCSOrchestrator:
         """Calculate knowledge retention accuracy"""
         # This would involve testing recall of compressed information
         # For now, return based on pattern confidence
-        conn = sqlite3.connect(self.db_path)
-        result = conn.execute("""
+        result = self.db.query_one("""
             SELECT AVG(confidence) FROM discovered_patterns
             WHERE usage_count > 0
-        """).fetchone()
-        conn.close()
+        """)
         
         return result[0] if result[0] else 0.0
 
+    def run_agent(self, agent_name: str, agent_class) -> Dict:
+        """Run one agent with its queries attributed to it in the LLM cache"""
+        print(f"\n[{datetime.datetime.now()}] Running {agent_name}")
+        with self.agent_scope(agent_name):
+            agent = agent_class(self)
+            agent_metrics = agent.run()
+        agent_metrics['task'] = agent.task_description
+        print(f"Completed {agent_name}: {agent_metrics}")
+        return agent_metrics
+        
     def run_all_agents(self):
         """Execute all automation agents"""
         print(f"[{datetime.datetime.now()}] Starting CDCS automation cycle")
@@ -261,13 +262,38 @@ class CDCSOrchestrator:
             ("system_health_monitor", system_health_monitor.SystemHealthMonitor)
         ]
         
-        for agent_name, agent_class in agents:
-            print(f"\n[{datetime.datetime.now()}] Running {agent_name}")
-            agent = agent_class(self)
-            agent_metrics = agent.run()
-            self.log_run(agent_name, agent.task_description, agent_metrics)
-            print(f"Completed {agent_name}: {agent_metrics}")
+        # Independent agents run concurrently; LLM calls stay capped by the
+        # shared client's concurrency limit (CDCS_LLM_CONCURRENCY)
+        scheduler = AgentScheduler(max_workers=int(os.environ.get("CDCS_AGENT_WORKERS", "4")))
+        outcomes = scheduler.run(agents, self.run_agent)
+        
+        runs = []
+        for agent_name, _ in agents:
+            outcome = outcomes[agent_name]
+            agent_metrics = outcome['result'] or {'metadata': {'error': outcome['error']}}
+            agent_metrics.setdefault('metadata', {}).update({
+                'execution_time': outcome['execution_time'],
+                'start_offset': outcome['start_offset'],
+                'end_offset': outcome['end_offset'],
+                'depends_on': outcome['depends_on'],
+                'llm_cache': self.llm_cache.metrics(agent_name)
+            })
+            runs.append((agent_name, agent_metrics.pop('task', agent_name), agent_metrics))
+            
+        critical_path, critical_seconds = scheduler.critical_path(outcomes)
+        cycle_seconds = max((o['end_offset'] for o in outcomes.values()), default=0.0)
+        runs.append(("orchestrator", "Automation cycle schedule", {'metadata': {
+            'execution_time': cycle_seconds,
+            'critical_path': critical_path,
+            'critical_path_seconds': critical_seconds,
+            'serial_seconds': sum(o['execution_time'] for o in outcomes.values())
+        }}))
+        print(f"Critical path: {' -> '.join(critical_path)} ({critical_seconds:.1f}s of {cycle_seconds:.1f}s)")
             
+        cache_metrics = self.llm_cache.metrics()
+        runs.append(("llm_cache", "LLM response cache statistics", {'metadata': cache_metrics}))
+        self.log_runs(runs)
+        print(f"LLM cache: {json.dumps(cache_metrics)}")
         print(f"\n[{datetime.datetime.now()}] CDCS automation cycle complete")
 
 if __name__ == "__main__":
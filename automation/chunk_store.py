@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Chunk Store - Content-addressed store of SPR-compressed session chunks
+Sessions are cut with a rolling hash so repeated blocks share chunks across
+sessions; each chunk is compressed once and referenced afterwards
+"""
+
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Content-defined chunking bounds (characters). A cut happens after a line
+# whose rolling hash has its low CDC_MASK bits clear, i.e. on average every
+# 32 lines once CDC_MIN_SIZE is reached - about 2KB of typical session text
+CDC_MIN_SIZE = 512
+CDC_MAX_SIZE = 4096
+CDC_MASK = 0x1F
+
+
+def chunk_hash(chunk: str, salt: str = '') -> str:
+    """Content address of a chunk; salt keeps compressions under different prompts apart"""
+    return hashlib.sha256((salt + chunk).encode()).hexdigest()
+
+
+def content_defined_chunks(content: str, min_size: int = CDC_MIN_SIZE,
+                           max_size: int = CDC_MAX_SIZE, mask: int = CDC_MASK) -> Iterator[str]:
+    """Split content at line boundaries chosen by a gear-style rolling hash
+
+    Boundaries depend only on the last few lines, so a block pasted into
+    several sessions is cut the same way wherever it appears.
+    """
+    current = []
+    size = 0
+    rolling = 0
+
+    for line in content.splitlines():
+        current.append(line)
+        size += len(line) + 1
+        # Shifting ages lines out: the low k bits only see the last k lines
+        rolling = ((rolling << 1) + zlib.crc32(line.encode())) & 0xFFFFFFFF
+
+        if size >= max_size or (size >= min_size and not rolling & mask):
+            yield '\n'.join(current)
+            current = []
+            size = 0
+
+    if current:
+        yield '\n'.join(current)
+
+
+class ChunkStore:
+    """SQLite-backed map of chunk hash -> compressed chunk"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                hash TEXT PRIMARY KEY,
+                size INTEGER,
+                compressed TEXT,
+                created_at REAL
+            )
+        """)
+        # Ordered chunk references per session; a chunk shared by many
+        # sessions is stored once in chunks
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_chunks (
+                session TEXT,
+                seq INTEGER,
+                hash TEXT,
+                size INTEGER,
+                PRIMARY KEY (session, seq)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_session_chunks_hash ON session_chunks(hash)")
+        self._conn.commit()
+
+    def get(self, hash_value: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT compressed FROM chunks WHERE hash = ?", (hash_value,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, hash_value: str, size: int, compressed: Dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunks (hash, size, compressed, created_at) VALUES (?, ?, ?, ?)",
+                (hash_value, size, json.dumps(compressed), time.time())
+            )
+            self._conn.commit()
+
+    def record_session(self, session: str, chunks: List[Tuple[str, int]]):
+        """Replace the ordered (hash, size) chunk references of a session"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM session_chunks WHERE session = ?", (session,))
+            self._conn.executemany(
+                "INSERT INTO session_chunks (session, seq, hash, size) VALUES (?, ?, ?, ?)",
+                [(session, seq, h, size) for seq, (h, size) in enumerate(chunks)]
+            )
+
+    def sessions(self) -> List[str]:
+        """Names of sessions with recorded chunk references"""
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT session FROM session_chunks").fetchall()
+        return [row[0] for row in rows]
+
+    def session_chunks(self, session: str) -> List[str]:
+        """Chunk hashes of a session in order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hash FROM session_chunks WHERE session = ? ORDER BY seq", (session,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> Dict:
+        """Logical vs unique bytes across all recorded sessions"""
+        with self._lock:
+            sessions, references, logical_bytes = self._conn.execute(
+                "SELECT COUNT(DISTINCT session), COUNT(*), COALESCE(SUM(size), 0) FROM session_chunks"
+            ).fetchone()
+            unique_chunks, unique_bytes = self._conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(size), 0)
+                FROM (SELECT hash, MAX(size) AS size FROM session_chunks GROUP BY hash)
+            """).fetchone()
+            # Only chunks the model actually compressed have a stored form
+            stored_logical, stored_compressed = self._conn.execute("""
+                SELECT COALESCE(SUM(r.size), 0),
+                       (SELECT COALESCE(SUM(LENGTH(c.compressed)), 0) FROM chunks c
+                        WHERE c.hash IN (SELECT hash FROM session_chunks))
+                FROM session_chunks r JOIN chunks c ON c.hash = r.hash
+            """).fetchone()
+
+        return {
+            'sessions': sessions,
+            'references': references,
+            'unique_chunks': unique_chunks,
+            'logical_bytes': logical_bytes,
+            'unique_bytes': unique_bytes,
+            'deduplicated_bytes': logical_bytes - unique_bytes,
+            'dedup_ratio': logical_bytes / unique_bytes if unique_bytes else 1.0,
+            'stored_logical_bytes': stored_logical,
+            'stored_compressed_bytes': stored_compressed
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Concept Graph - Compressed sparse row graph over the persisted concept tables
+NumPy index/weight arrays with vectorized degrees, union-find components and
+label-propagation clustering; networkx is only needed for export
+"""
+
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+try:
+    import networkx as nx
+    HAS_NETWORKX = True
+except ImportError:
+    HAS_NETWORKX = False
+
+
+class ConceptGraph:
+    """Directed weighted concept graph stored as CSR arrays"""
+
+    def __init__(self, node_ids: List[str], attributes: Dict[str, np.ndarray],
+                 sources: np.ndarray, targets: np.ndarray, weights: np.ndarray):
+        self.node_ids = list(node_ids)
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.attributes = attributes
+        n = len(self.node_ids)
+
+        # Out-edges in CSR order: row i spans indices[indptr[i]:indptr[i + 1]]
+        order = np.lexsort((targets, sources))
+        self.sources = sources[order]
+        self.indices = targets[order]
+        self.weights = weights[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.sources, minlength=n), out=self.indptr[1:])
+
+    @classmethod
+    def from_store(cls, store) -> 'ConceptGraph':
+        """Build from a KnowledgeStore's concept and edge tables"""
+        session_files = store.session_files()
+        node_ids, names, types, descriptions = [], [], [], []
+        importance, occurrences, first_seen, sessions = [], [], [], []
+
+        for node_id, data in store.iter_concepts():
+            node_ids.append(node_id)
+            names.append(data['name'])
+            types.append(data['type'])
+            descriptions.append(data['description'])
+            importance.append(data['importance'])
+            occurrences.append(data['occurrence_count'])
+            first_seen.append(session_files.get(data['first_seen']))
+            sessions.append(data['sessions'])
+
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        edges = [(index[s], index[t], w) for s, t, w in store.iter_edges()
+                 if s in index and t in index]
+        edge_array = np.array(edges, dtype=np.int64).reshape(-1, 3)
+
+        attributes = {
+            'name': np.array(names, dtype=object),
+            'type': np.array(types, dtype=object),
+            'description': np.array(descriptions, dtype=object),
+            'importance': np.array(importance, dtype=np.float64),
+            'occurrence_count': np.array(occurrences, dtype=np.int64),
+            'first_seen': np.array(first_seen, dtype=object),
+            'sessions': sessions
+        }
+        return cls(node_ids, attributes, edge_array[:, 0], edge_array[:, 1],
+                   edge_array[:, 2].astype(np.float64))
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    def node(self, node_id: str) -> Dict:
+        """Attributes of one node"""
+        i = self.index[node_id]
+        return {key: values[i] for key, values in self.attributes.items()}
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def in_degree(self) -> np.ndarray:
+        return np.bincount(self.indices, minlength=len(self))
+
+    def degree(self) -> np.ndarray:
+        return self.out_degree() + self.in_degree()
+
+    def weighted_degree(self) -> np.ndarray:
+        """Sum of incident edge weights, both directions"""
+        n = len(self)
+        return (np.bincount(self.sources, weights=self.weights, minlength=n) +
+                np.bincount(self.indices, weights=self.weights, minlength=n))
+
+    def neighbors(self, node_id: str) -> List[str]:
+        i = self.index[node_id]
+        return [self.node_ids[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def density(self) -> float:
+        n = len(self)
+        return self.num_edges / (n * (n - 1)) if n > 1 else 0.0
+
+    def component_labels(self) -> np.ndarray:
+        """Weakly connected component root of every node
+
+        Union-find over the whole edge list at once: every round hooks the
+        larger root of each edge under the smaller one, then compresses
+        paths by pointer jumping until all roots are stable.
+        """
+        parent = np.arange(len(self), dtype=np.int64)
+        src, dst = self.sources, self.indices
+
+        while True:
+            root_src, root_dst = parent[src], parent[dst]
+            differ = root_src != root_dst
+            if not differ.any():
+                return parent
+            low = np.minimum(root_src[differ], root_dst[differ])
+            high = np.maximum(root_src[differ], root_dst[differ])
+            np.minimum.at(parent, high, low)
+            while True:
+                grandparent = parent[parent]
+                if np.array_equal(grandparent, parent):
+                    break
+                parent = grandparent
+
+    def connected_components(self) -> List[Set[str]]:
+        return self._groups(self.component_labels())
+
+    def label_propagation(self, max_iterations: int = 20) -> np.ndarray:
+        """Community label of every node by weighted label propagation
+
+        Edges are treated as undirected. Each round, every node adopts the
+        label carrying the most incident weight (ties go to the smallest
+        label); a small self weight damps the oscillation synchronous
+        updates otherwise show on bipartite structures.
+        """
+        n = len(self)
+        labels = np.arange(n, dtype=np.int64)
+        if not self.num_edges:
+            return labels
+
+        nodes = np.concatenate([self.sources, self.indices, np.arange(n)])
+        neighbours = np.concatenate([self.indices, self.sources, np.arange(n)])
+        weights = np.concatenate([self.weights, self.weights, np.full(n, 0.5)])
+
+        for _ in range(max_iterations):
+            # Total weight per (node, candidate label), then the best per node
+            keys = nodes * n + labels[neighbours]
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            totals = np.bincount(inverse, weights=weights)
+            key_nodes = unique_keys // n
+            order = np.lexsort((unique_keys % n, -totals, key_nodes))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = key_nodes[order][1:] != key_nodes[order][:-1]
+            best = order[first]
+
+            new_labels = labels.copy()
+            new_labels[key_nodes[best]] = unique_keys[best] % n
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+
+        return labels
+
+    def clusters(self, max_iterations: int = 20) -> List[Set[str]]:
+        return self._groups(self.label_propagation(max_iterations))
+
+    def _groups(self, labels: np.ndarray) -> List[Set[str]]:
+        order = np.argsort(labels, kind='stable')
+        boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+        return [{self.node_ids[i] for i in group} for group in np.split(order, boundaries)
+                if len(group)]
+
+    def to_node_link(self) -> Dict:
+        """JSON-serializable node-link form (same shape as nx.node_link_data)"""
+        nodes = []
+        for i, node_id in enumerate(self.node_ids):
+            data = {key: values[i] for key, values in self.attributes.items()}
+            data['sessions'] = [int(s) for s in data['sessions']]
+            data['importance'] = float(data['importance'])
+            data['occurrence_count'] = int(data['occurrence_count'])
+            data['id'] = node_id
+            nodes.append(data)
+        links = [{'source': self.node_ids[s], 'target': self.node_ids[t], 'weight': float(w)}
+                 for s, t, w in zip(self.sources, self.indices, self.weights)]
+        return {'directed': True, 'multigraph': False, 'graph': {}, 'nodes': nodes, 'links': links}
+
+    def to_networkx(self) -> Optional['nx.DiGraph']:
+        """Export as a networkx DiGraph, or None when networkx is unavailable"""
+        if not HAS_NETWORKX:
+            return None
+        graph = nx.DiGraph()
+        for node_id in self.node_ids:
+            graph.add_node(node_id, **self.node(node_id))
+        graph.add_weighted_edges_from(
+            (self.node_ids[s], self.node_ids[t], float(w))
+            for s, t, w in zip(self.sources, self.indices, self.weights)
+        )
+        return graph
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+FS Watcher - File system change watchers for the real-time automation loop
+Linux inotify through ctypes (recursive watches, coalesced events, overflow
+resync) with a scandir polling fallback that also reports deletions
+
+Both backends call callback(event) with event = {'path', 'type',
+'timestamp'}; type is created, modified, deleted, renamed (path is the
+new name and the event also carries 'old_path'), overflow when the
+kernel queue overflowed and consumers should treat the tree as changed,
+or degraded when inotify could not watch a new directory (watch limit)
+and consumers should fall back to polling.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+    _libc.inotify_init1.argtypes = [ctypes.c_int]
+    _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    _libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    HAS_INOTIFY = sys.platform.startswith('linux')
+except (OSError, AttributeError):
+    HAS_INOTIFY = False
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+EVENT_HEADER = struct.Struct("iIII")
+
+# Events for one path arriving within this window are merged into one
+COALESCE_WINDOW = 0.05
+# ...but a steady stream is still flushed at least this often
+MAX_LATENCY = 0.5
+POLL_INTERVAL = 1.0
+
+# (pending type, new type) -> merged type; None drops the path entirely
+COALESCE = {
+    ('created', 'modified'): 'created',
+    ('created', 'deleted'): None,
+    ('modified', 'modified'): 'modified',
+    ('modified', 'deleted'): 'deleted',
+    ('deleted', 'created'): 'modified',
+    ('deleted', 'modified'): 'modified',
+    ('created', 'created'): 'created',
+    ('modified', 'created'): 'modified',
+    ('deleted', 'deleted'): 'deleted',
+    ('created', 'renamed'): 'renamed',
+    ('modified', 'renamed'): 'renamed',
+    ('deleted', 'renamed'): 'renamed',
+    ('renamed', 'renamed'): 'renamed',
+    ('renamed', 'modified'): 'renamed',
+    ('renamed', 'created'): 'modified',
+    ('renamed', 'deleted'): 'deleted',
+}
+
+
+def visible(name: str) -> bool:
+    """Hidden files and directories are neither watched nor reported"""
+    return not name.startswith('.')
+
+
+class InotifyWatcher:
+    """Recursive inotify watcher; one watch descriptor per directory"""
+
+    def __init__(self, paths: Iterable[Path], callback: Callable[[Dict], None],
+                 coalesce_window: float = COALESCE_WINDOW):
+        if not HAS_INOTIFY:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self.roots = [str(p) for p in paths if Path(p).is_dir()]
+        self.callback = callback
+        self.coalesce_window = coalesce_window
+        self.fd = -1
+        self.watches: Dict[int, str] = {}
+        self.watched: Dict[str, int] = {}
+        self.pending: Dict[str, str] = {}
+        # Move cookie -> source path until its IN_MOVED_TO arrives
+        self.moves: Dict[int, str] = {}
+        # Destination -> source of pending renames
+        self.renamed_from: Dict[str, str] = {}
+        self.stats = {'events': 0, 'delivered': 0, 'coalesced': 0, 'overflows': 0, 'watch_errors': 0}
+        self.running = False
+        self.thread = None
+
+    def _add_watch(self, directory: str) -> bool:
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                # fs.inotify.max_user_watches is exhausted
+                raise OSError(err, f"inotify watch limit reached at {directory}")
+            self.stats['watch_errors'] += 1
+            return False
+        self.watches[wd] = directory
+        self.watched[directory] = wd
+        return True
+
+    def _watch_tree(self, root: str, report: bool = False):
+        """Watch root and every visible directory below it
+
+        With report, files found are emitted as created: they may have
+        appeared before their directory's watch existed.
+        """
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            if directory in self.watched or not self._add_watch(directory):
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not visible(entry.name):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif report:
+                            self._queue(entry.path, 'created')
+            except OSError:
+                pass
+
+    def _unwatch_tree(self, root: str):
+        prefix = root + os.sep
+        for directory in [d for d in self.watched if d == root or d.startswith(prefix)]:
+            wd = self.watched.pop(directory)
+            self.watches.pop(wd, None)
+            _libc.inotify_rm_watch(self.fd, wd)
+
+    def start(self):
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        try:
+            for root in self.roots:
+                self._watch_tree(root)
+        except OSError:
+            os.close(self.fd)
+            self.fd = -1
+            raise
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the reader; the descriptor is closed by the reader thread as it exits"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+            if not self.thread.is_alive():
+                self.thread = None
+
+    def _loop(self):
+        try:
+            self._read_events()
+        finally:
+            os.close(self.fd)
+            self.fd = -1
+
+    def _read_events(self):
+        oldest = None
+        while self.running:
+            timeout = self.coalesce_window if self.pending else 0.2
+            readable, _, _ = select.select([self.fd], [], [], timeout)
+            if readable:
+                try:
+                    data = os.read(self.fd, 256 * 1024)
+                except BlockingIOError:
+                    data = b''
+                self._parse(data)
+                if self.pending and oldest is None:
+                    oldest = time.monotonic()
+            # Flush once the path has been quiet for a window, or the batch is too old
+            if self.pending and (not readable or time.monotonic() - oldest >= MAX_LATENCY):
+                self._flush()
+                oldest = None
+        self._flush()
+
+    def _parse(self, data: bytes):
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode(errors='surrogateescape')
+            offset += length
+            self.stats['events'] += 1
+
+            if mask & IN_Q_OVERFLOW:
+                self._overflow()
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                if self.watched.get(directory) == wd:
+                    del self.watched[directory]
+                continue
+            if not name or not visible(name):
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._watch_tree(path, report=True)
+                    except OSError:
+                        self._degrade(path)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._unwatch_tree(path)
+                continue
+
+            if mask & IN_MOVED_FROM:
+                # Held until the matching IN_MOVED_TO; unpaired it becomes a delete at flush
+                self.moves[cookie] = path
+            elif mask & IN_MOVED_TO and cookie in self.moves:
+                self._rename(self.moves.pop(cookie), path)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                self._queue(path, 'created')
+            elif mask & IN_DELETE:
+                self._queue(path, 'deleted')
+            elif mask & (IN_MODIFY | IN_CLOSE_WRITE):
+                self._queue(path, 'modified')
+
+    def _queue(self, path: str, event_type: str):
+        previous = self.pending.get(path)
+        if previous is None:
+            self.pending[path] = event_type
+            return
+        self.stats['coalesced'] += 1
+        merged = COALESCE[(previous, event_type)]
+        if merged != 'renamed':
+            self.renamed_from.pop(path, None)
+        if merged is None:
+            del self.pending[path]
+        else:
+            self.pending[path] = merged
+
+    def _rename(self, source: str, path: str):
+        # Creates and renames still pending at the source carry over to the destination
+        previous = self.pending.get(source)
+        if previous in ('created', 'renamed'):
+            del self.pending[source]
+            source = self.renamed_from.pop(source, source)
+        if previous == 'created':
+            self._queue(path, 'created')
+        else:
+            self.renamed_from[path] = source
+            self._queue(path, 'renamed')
+
+    def _overflow(self):
+        """Events were lost: re-establish watches and tell consumers to resync"""
+        self.stats['overflows'] += 1
+        self.pending.clear()
+        self.moves.clear()
+        self.renamed_from.clear()
+        for root in self.roots:
+            try:
+                self._watch_tree(root)
+            except OSError:
+                self._degrade(root)
+            self._deliver(root, 'overflow')
+
+    def _degrade(self, path: str):
+        """A directory could not be watched: keep running, tell consumers to poll"""
+        self.stats['watch_errors'] += 1
+        self._deliver(path, 'degraded')
+
+    def _flush(self):
+        # Files moved out of the watched tree
+        for path in self.moves.values():
+            self._queue(path, 'deleted')
+        self.moves.clear()
+        pending, self.pending = self.pending, {}
+        renamed_from, self.renamed_from = self.renamed_from, {}
+        for path, event_type in pending.items():
+            self._deliver(path, event_type, renamed_from.get(path))
+
+    def _deliver(self, path: str, event_type: str, old_path: Optional[str] = None):
+        self.stats['delivered'] += 1
+        event = {'path': path, 'type': event_type, 'timestamp': datetime.now()}
+        if old_path is not None:
+            event['old_path'] = old_path
+        try:
+            self.callback(event)
+        except Exception as e:
+            print(f"Watcher callback error for {path}: {e}")
+
+
+class PollingWatcher:
+    """Periodic scandir snapshot diff; detects creates, modifies, deletes and renames"""
+
+    def __init__(self, paths: Iterable[Path], callback: Callable[[Dict], None],
+                 interval: float = POLL_INTERVAL):
+        self.roots = [str(p) for p in paths]
+        self.callback = callback
+        self.interval = interval
+        self.state: Dict[str, tuple] = {}
+        self.stats = {'scans': 0, 'delivered': 0, 'last_scan_seconds': 0.0}
+        self.running = False
+        self.thread = None
+
+    def snapshot(self) -> Dict[str, tuple]:
+        """(mtime_ns, size, inode) of every visible file under the roots"""
+        state = {}
+        stack = [root for root in self.roots if os.path.isdir(root)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if not visible(entry.name):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                stat = entry.stat(follow_symlinks=False)
+                                state[entry.path] = (stat.st_mtime_ns, stat.st_size, entry.inode())
+                        except OSError:
+                            pass  # Removed while scanning
+            except OSError:
+                pass
+        return state
+
+    def scan(self) -> List[Dict]:
+        """Diff a new snapshot against the previous one"""
+        start = time.perf_counter()
+        current = self.snapshot()
+        events = []
+        now = datetime.now()
+        if self.stats['scans']:
+            # A file that vanished and one that appeared with its inode, size and mtime are a rename
+            removed = {self.state[path]: path for path in self.state.keys() - current.keys()}
+            for path, state in current.items():
+                previous = self.state.get(path)
+                if previous is None:
+                    old_path = removed.pop(state, None)
+                    if old_path is None:
+                        events.append({'path': path, 'type': 'created', 'timestamp': now})
+                    else:
+                        events.append({'path': path, 'type': 'renamed', 'old_path': old_path, 'timestamp': now})
+                elif previous != state:
+                    events.append({'path': path, 'type': 'modified', 'timestamp': now})
+            for path in removed.values():
+                events.append({'path': path, 'type': 'deleted', 'timestamp': now})
+        self.state = current
+        self.stats['scans'] += 1
+        self.stats['last_scan_seconds'] = time.perf_counter() - start
+        return events
+
+    def start(self):
+        self.scan()  # Baseline; existing files are not reported as created
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=self.interval + 1)
+            self.thread = None
+
+    def _loop(self):
+        while self.running:
+            time.sleep(self.interval)
+            for event in self.scan():
+                self.stats['delivered'] += 1
+                try:
+                    self.callback(event)
+                except Exception as e:
+                    print(f"Watcher callback error for {event['path']}: {e}")
+
+
+def create_watcher(paths: Iterable[Path], callback: Callable[[Dict], None], backend: str = 'auto'):
+    """inotify where available, else polling; backend may force either"""
+    paths = list(paths)
+    if backend in ('auto', 'inotify') and HAS_INOTIFY:
+        return InotifyWatcher(paths, callback)
+    if backend == 'inotify':
+        raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+    return PollingWatcher(paths, callback)
+
+
+def benchmark(files: int = 100000, per_directory: int = 100, seconds: float = 5.0):
+    """Setup cost, idle CPU and change latency of both backends on one tree"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as root:
+        for i in range(files):
+            directory = os.path.join(root, f"d{i // per_directory // 100}", f"d{i // per_directory}")
+            if i % per_directory == 0:
+                os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"f{i}.txt"), 'w') as f:
+                f.write("x")
+        print(f"=== Watcher Benchmark ({files} files, {files // per_directory} directories) ===")
+
+        backends = [('polling', PollingWatcher)] + ([('inotify', InotifyWatcher)] if HAS_INOTIFY else [])
+        for name, watcher_class in backends:
+            seen = {}
+            arrived = threading.Event()
+
+            def callback(event):
+                seen[event['path']] = event['type']
+                arrived.set()
+
+            watcher = watcher_class([root], callback)
+            start = time.perf_counter()
+            watcher.start()
+            setup = time.perf_counter() - start
+
+            cpu = time.process_time()
+            time.sleep(seconds)
+            idle_cpu = (time.process_time() - cpu) / seconds * 100
+
+            latencies = {}
+            target = os.path.join(root, "d0", "d0", "f0.txt")
+            for event_type, change in (('modified', lambda: open(target, 'a').write("y")),
+                                       ('deleted', lambda: os.remove(target))):
+                arrived.clear()
+                seen.clear()
+                start = time.perf_counter()
+                change()
+                while seen.get(target) != event_type and arrived.wait(timeout=5):
+                    arrived.clear()
+                latencies[event_type] = (time.perf_counter() - start) * 1000 if seen.get(target) == event_type else None
+            watcher.stop()
+            with open(target, 'w') as f:
+                f.write("x")
+
+            detected = ', '.join(f"{t} {ms:.0f} ms" if ms is not None else f"{t} missed"
+                                 for t, ms in latencies.items())
+            print(f"{name:<8} setup {setup:6.2f}s  idle CPU {idle_cpu:5.1f}%  {detected}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Intelligence DB - Shared data-access layer for cdcs_intelligence.db
+Per-thread pooled WAL-mode connections, batched writes and query indexes
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS automation_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        agent TEXT,
+        task TEXT,
+        tokens_processed INTEGER,
+        patterns_found INTEGER,
+        compression_achieved REAL,
+        evolution_score REAL,
+        metadata TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS discovered_patterns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        pattern_hash TEXT UNIQUE,
+        pattern_content TEXT,
+        confidence REAL,
+        usage_count INTEGER DEFAULT 0,
+        information_gain REAL,
+        category TEXT,
+        last_used TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS system_metrics (
+        timestamp TEXT PRIMARY KEY,
+        context_efficiency REAL,
+        pattern_hit_rate REAL,
+        compression_ratio REAL,
+        evolution_velocity REAL,
+        knowledge_retention REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_runs_timestamp_agent ON automation_runs(timestamp, agent)",
+    "CREATE INDEX IF NOT EXISTS idx_patterns_confidence_usage ON discovered_patterns(confidence, usage_count)"
+]
+
+# Columns added after a table was first created: (table, column, type, backfill)
+COLUMNS = [
+    # When usage_count last went up; rows used before the column existed
+    # are dated by their insertion time
+    ("discovered_patterns", "last_used", "TEXT",
+     "UPDATE discovered_patterns SET last_used = timestamp WHERE usage_count > 0"),
+]
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_patterns_last_used ON discovered_patterns(last_used)"
+]
+
+
+class IntelligenceDB:
+    """Thread-local connection pool over one SQLite database"""
+
+    def __init__(self, db_path: Path, timeout: float = 30.0):
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.init_schema()
+
+    def connection(self) -> sqlite3.Connection:
+        """The calling thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout,
+                                   cached_statements=256, check_same_thread=False)
+            # WAL lets readers proceed while one agent writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def init_schema(self):
+        """Create tables and indexes if they do not exist"""
+        with self.transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            for table, column, column_type, backfill in COLUMNS:
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                    conn.execute(backfill)
+            for statement in INDEXES:
+                conn.execute(statement)
+
+    @contextmanager
+    def transaction(self):
+        """Commit on success, roll back on error"""
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """Run one write statement in its own transaction"""
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def executemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> int:
+        """Run a prepared statement over many rows in a single transaction"""
+        with self.transaction() as conn:
+            return conn.executemany(sql, rows).rowcount
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        return self.connection().execute(sql, params).fetchone()
+
+    def close_all(self):
+        """Close every pooled connection (call once all workers are done)"""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Knowledge Store - Persistent concept graph for the Knowledge Synthesizer
+Node, edge and merged-session tables; each cycle only merges new sessions
+"""
+
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Per-concept session lists are stored as packed uint32 session IDs
+SESSION_ID_DTYPE = np.uint32
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY,
+        file TEXT UNIQUE,
+        sha256 TEXT,
+        merged_at REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS concepts (
+        node_id TEXT PRIMARY KEY,
+        name TEXT,
+        type TEXT,
+        description TEXT,
+        importance REAL,
+        first_seen INTEGER,
+        occurrence_count INTEGER,
+        sessions BLOB
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS edges (
+        source TEXT,
+        target TEXT,
+        weight INTEGER,
+        PRIMARY KEY (source, target)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS session_concepts (
+        session_id INTEGER,
+        node_id TEXT,
+        PRIMARY KEY (session_id, node_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS session_edges (
+        session_id INTEGER,
+        source TEXT,
+        target TEXT,
+        count INTEGER,
+        PRIMARY KEY (session_id, source, target)
+    ) WITHOUT ROWID
+    """
+]
+
+
+def concept_id(name: str) -> str:
+    """Node ID of a concept name"""
+    return name.lower().replace(' ', '_')
+
+
+def unpack_sessions(blob: Optional[bytes]) -> np.ndarray:
+    return np.frombuffer(blob or b'', dtype=SESSION_ID_DTYPE)
+
+
+class KnowledgeStore:
+    """SQLite-backed concept graph merged one session at a time"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+
+    def merged_sessions(self) -> Dict[str, str]:
+        """file -> sha256 of every session already in the graph"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT file, sha256 FROM sessions"))
+
+    def pending(self, sessions: List[Dict]) -> List[Dict]:
+        """Sessions that are new, or whose content changed since they were merged"""
+        merged = self.merged_sessions()
+        return [s for s in sessions if merged.get(s['file']) != s.get('sha256')]
+
+    def merge_session(self, file: str, sha256: str, concepts: List[Dict]) -> Dict[str, int]:
+        """Apply one session's concepts and relations as a single delta"""
+        counts = {'nodes_added': 0, 'nodes_updated': 0, 'edges_added': 0, 'edges_updated': 0}
+
+        with self._lock, self._conn:
+            conn = self._conn
+            previous = conn.execute("SELECT id FROM sessions WHERE file = ?", (file,)).fetchone()
+            if previous:
+                # A changed session replaces its old version rather than adding to it
+                self._retract(previous[0])
+            conn.execute(
+                "INSERT INTO sessions (file, sha256, merged_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(file) DO UPDATE SET sha256 = excluded.sha256, merged_at = excluded.merged_at",
+                (file, sha256, time.time())
+            )
+            session_id = conn.execute("SELECT id FROM sessions WHERE file = ?", (file,)).fetchone()[0]
+
+            for concept in concepts:
+                node_id = concept_id(concept['name'])
+                conn.execute("INSERT OR IGNORE INTO session_concepts VALUES (?, ?)", (session_id, node_id))
+                row = conn.execute(
+                    "SELECT importance, occurrence_count, sessions FROM concepts WHERE node_id = ?",
+                    (node_id,)
+                ).fetchone()
+
+                if row is None:
+                    conn.execute(
+                        "INSERT INTO concepts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (node_id, concept['name'], concept.get('type', 'domain'),
+                         concept.get('description', ''), concept.get('importance', 0.5),
+                         session_id, 1, np.array([session_id], dtype=SESSION_ID_DTYPE).tobytes())
+                    )
+                    counts['nodes_added'] += 1
+                else:
+                    importance, occurrences, blob = row
+                    session_ids = unpack_sessions(blob)
+                    if session_id not in session_ids:
+                        # A re-merged (changed) session is not counted twice
+                        occurrences += 1
+                        blob = np.append(session_ids, SESSION_ID_DTYPE(session_id)).tobytes()
+                    conn.execute(
+                        "UPDATE concepts SET importance = ?, occurrence_count = ?, sessions = ?, "
+                        "first_seen = MIN(first_seen, ?) WHERE node_id = ?",
+                        (max(importance, concept.get('importance', 0.5)), occurrences, blob, session_id, node_id)
+                    )
+                    counts['nodes_updated'] += 1
+
+                # Relations only link concepts that are already known
+                for related in concept.get('related_to', []):
+                    related_id = concept_id(related)
+                    if not conn.execute("SELECT 1 FROM concepts WHERE node_id = ?", (related_id,)).fetchone():
+                        continue
+                    conn.execute(
+                        "INSERT INTO session_edges VALUES (?, ?, ?, 1) "
+                        "ON CONFLICT(session_id, source, target) DO UPDATE SET count = count + 1",
+                        (session_id, node_id, related_id)
+                    )
+                    updated = conn.execute(
+                        "UPDATE edges SET weight = weight + 1 WHERE source = ? AND target = ?",
+                        (node_id, related_id)
+                    ).rowcount
+                    if updated:
+                        counts['edges_updated'] += 1
+                    else:
+                        conn.execute("INSERT INTO edges VALUES (?, ?, 1)", (node_id, related_id))
+                        counts['edges_added'] += 1
+
+        return counts
+
+    def _retract(self, session_id: int):
+        """Remove one session's concept memberships and edge weights (inside the transaction)"""
+        conn = self._conn
+        node_ids = [row[0] for row in conn.execute(
+            "SELECT node_id FROM session_concepts WHERE session_id = ?", (session_id,))]
+        if not node_ids:
+            # Merged before contributions were recorded: find memberships by scan
+            node_ids = [node_id for node_id, blob in conn.execute("SELECT node_id, sessions FROM concepts")
+                        if session_id in unpack_sessions(blob)]
+
+        for node_id in node_ids:
+            row = conn.execute("SELECT sessions FROM concepts WHERE node_id = ?", (node_id,)).fetchone()
+            if row is None:
+                continue
+            session_ids = unpack_sessions(row[0])
+            remaining = session_ids[session_ids != session_id]
+            if not len(remaining):
+                conn.execute("DELETE FROM concepts WHERE node_id = ?", (node_id,))
+                conn.execute("DELETE FROM edges WHERE source = ? OR target = ?", (node_id, node_id))
+            elif len(remaining) < len(session_ids):
+                conn.execute(
+                    "UPDATE concepts SET occurrence_count = ?, sessions = ?, first_seen = ? WHERE node_id = ?",
+                    (len(remaining), remaining.tobytes(), int(remaining.min()), node_id)
+                )
+
+        conn.executemany(
+            "UPDATE edges SET weight = weight - ? WHERE source = ? AND target = ?",
+            [(count, source, target) for source, target, count in conn.execute(
+                "SELECT source, target, count FROM session_edges WHERE session_id = ?", (session_id,))]
+        )
+        conn.execute("DELETE FROM edges WHERE weight <= 0")
+        conn.execute("DELETE FROM session_concepts WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM session_edges WHERE session_id = ?", (session_id,))
+
+    def session_files(self) -> Dict[int, str]:
+        """session ID -> file name"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT id, file FROM sessions"))
+
+    def iter_concepts(self) -> Iterator[Tuple[str, Dict]]:
+        """(node_id, attributes) with sessions as a uint32 ID array"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT node_id, name, type, description, importance, first_seen, occurrence_count, sessions "
+                "FROM concepts ORDER BY node_id"
+            ).fetchall()
+        for node_id, name, type_, description, importance, first_seen, occurrences, blob in rows:
+            yield node_id, {
+                'name': name,
+                'type': type_,
+                'description': description,
+                'importance': importance,
+                'first_seen': first_seen,
+                'occurrence_count': occurrences,
+                'sessions': unpack_sessions(blob)
+            }
+
+    def iter_edges(self) -> Iterator[Tuple[str, str, int]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT source, target, weight FROM edges").fetchall()
+        return iter(rows)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'sessions': self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0],
+                'concepts': self._conn.execute("SELECT COUNT(*) FROM concepts").fetchone()[0],
+                'edges': self._conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
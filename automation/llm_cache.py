@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache - Content-addressed on-disk cache for ollama responses
+Keyed by model, system prompt and prompt hash with per-agent TTL and LRU eviction
+"""
+
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from collections import defaultdict
+
+# Seconds a cached response stays valid for each agent. Agents whose prompts
+# depend on slowly changing inputs (whole sessions) can keep answers longer.
+DEFAULT_AGENT_TTLS = {
+    'pattern_miner': 24 * 3600,
+    'memory_optimizer': 7 * 24 * 3600,
+    'knowledge_synthesizer': 7 * 24 * 3600,
+    'evolution_hunter': 12 * 3600,
+    'predictive_loader': 3600,
+    'system_health_monitor': 3600
+}
+
+
+class LLMResponseCache:
+    """SQLite-backed response store with size cap and LRU eviction"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 256 * 1024 * 1024,
+                 default_ttl: int = 24 * 3600, agent_ttls: Dict[str, int] = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "llm_responses.db"
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.agent_ttls = dict(DEFAULT_AGENT_TTLS, **(agent_ttls or {}))
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                agent TEXT,
+                model TEXT,
+                response TEXT,
+                size INTEGER,
+                created_at REAL,
+                last_access REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        self._conn.commit()
+
+        self.total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        self.stats = defaultdict(lambda: defaultdict(int))
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, prompt: str) -> str:
+        """Content address for a request"""
+        digest = hashlib.sha256()
+        for part in (model, system_prompt, prompt):
+            digest.update(hashlib.sha256(part.encode()).digest())
+        return digest.hexdigest()
+
+    def ttl_for(self, agent: Optional[str]) -> int:
+        return self.agent_ttls.get(agent, self.default_ttl)
+
+    def get(self, key: str, agent: Optional[str] = None) -> Optional[str]:
+        """Return a live cached response or None"""
+        agent = agent or 'default'
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, size, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.stats[agent]['misses'] += 1
+                return None
+
+            response, size, created_at = row
+            if now - created_at > self.ttl_for(agent):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.total_bytes -= size
+                self.stats[agent]['expired'] += 1
+                self.stats[agent]['misses'] += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats[agent]['hits'] += 1
+            return response
+
+    def put(self, key: str, response: str, agent: Optional[str] = None, model: str = ""):
+        """Store a response and evict least recently used entries over the cap"""
+        agent = agent or 'default'
+        size = len(response.encode())
+        now = time.time()
+
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if previous:
+                self.total_bytes -= previous[0]
+
+            self._conn.execute("""
+                INSERT OR REPLACE INTO responses
+                (key, agent, model, response, size, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (key, agent, model, response, size, now, now))
+            self.total_bytes += size
+            self.stats[agent]['stores'] += 1
+
+            if self.total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+
+            self._conn.commit()
+
+    def _evict(self, target_bytes: int):
+        """Drop least recently used entries until the cache fits target_bytes"""
+        cursor = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access")
+        evicted = []
+
+        for key, size in cursor:
+            if self.total_bytes <= target_bytes:
+                break
+            evicted.append((key,))
+            self.total_bytes -= size
+
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.stats['default']['evictions'] += len(evicted)
+
+    def metrics(self, agent: Optional[str] = None) -> Dict:
+        """Hit/miss counters, overall or for a single agent"""
+        with self._lock:
+            if agent is not None:
+                counters = dict(self.stats.get(agent, {}))
+            else:
+                counters = defaultdict(int)
+                for agent_stats in self.stats.values():
+                    for name, value in agent_stats.items():
+                        counters[name] += value
+                counters = dict(counters)
+                counters['entries'] = self._conn.execute(
+                    "SELECT COUNT(*) FROM responses"
+                ).fetchone()[0]
+                counters['bytes'] = self.total_bytes
+
+        lookups = counters.get('hits', 0) + counters.get('misses', 0)
+        counters['hit_rate'] = counters.get('hits', 0) / lookups if lookups else 0.0
+        return counters
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+LLM Client - Persistent pooled HTTP client for the local ollama server
+Replaces per-call `ollama run` subprocesses with keep-alive connections
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import threading
+import http.client
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+DEFAULT_HOST = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+DEFAULT_CONCURRENCY = int(os.environ.get("CDCS_LLM_CONCURRENCY", "4"))
+DEFAULT_TIMEOUT = float(os.environ.get("CDCS_LLM_TIMEOUT", "120"))
+DEFAULT_RETRIES = int(os.environ.get("CDCS_LLM_RETRIES", "2"))
+
+
+class LLMClientError(Exception):
+    """Raised when the model server cannot produce a response"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def retryable(self) -> bool:
+        # Connection failures and server errors are worth another attempt,
+        # client errors (unknown model, bad request) are not
+        return self.status is None or self.status >= 500
+
+
+class OllamaClient:
+    """Thread-safe ollama client with a keep-alive connection pool"""
+
+    def __init__(self, model: str = "qwen3:latest", host: str = None,
+                 max_concurrency: int = None, timeout: float = None,
+                 retries: int = None, backoff: float = 0.5):
+        host = host or DEFAULT_HOST
+        parsed = urlparse(host if "://" in host else f"http://{host}")
+        self.model = model
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 11434
+        self.max_concurrency = max_concurrency or DEFAULT_CONCURRENCY
+        self.timeout = timeout or DEFAULT_TIMEOUT
+        self.retries = DEFAULT_RETRIES if retries is None else retries
+        self.backoff = backoff
+
+        # One idle connection per concurrency slot is all we can ever use
+        self._pool = queue.LifoQueue(maxsize=self.max_concurrency)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'failures': 0,
+            'retries': 0,
+            'connections_opened': 0
+        }
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _acquire_connection(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            self._count('connections_opened')
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _release_connection(self, conn: http.client.HTTPConnection):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _post(self, path: str, payload: Dict) -> Dict:
+        """POST a JSON payload on a pooled connection and decode the reply"""
+        body = json.dumps(payload).encode()
+        conn = self._acquire_connection()
+
+        try:
+            conn.request("POST", path, body=body, headers={
+                "Content-Type": "application/json",
+                "Connection": "keep-alive"
+            })
+            response = conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError) as e:
+            # Stale keep-alive sockets end up here; drop them from the pool
+            conn.close()
+            raise LLMClientError(f"{type(e).__name__}: {e}") from e
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release_connection(conn)
+
+        if response.status >= 400:
+            raise LLMClientError(
+                f"HTTP {response.status}: {data[:200].decode(errors='replace')}",
+                status=response.status
+            )
+
+        try:
+            return json.loads(data)
+        except ValueError as e:
+            raise LLMClientError(f"Invalid JSON from model server: {e}") from e
+
+    def generate(self, prompt: str, system: str = "", model: str = None,
+                 format: str = None, options: Dict = None) -> str:
+        """Run a non-streaming completion and return the response text"""
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": False
+        }
+        if system:
+            payload["system"] = system
+        if format:
+            payload["format"] = format
+        if options:
+            payload["options"] = options
+
+        self._count('requests')
+
+        with self._slots:
+            for attempt in range(self.retries + 1):
+                try:
+                    return self._post("/api/generate", payload).get("response", "").strip()
+                except LLMClientError as e:
+                    if not e.retryable or attempt == self.retries:
+                        self._count('failures')
+                        raise
+                    self._count('retries')
+                    time.sleep(self.backoff * (2 ** attempt))
+
+    def close(self):
+        """Close every idle pooled connection"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def benchmark(requests: int = 200, workers: int = 4, latency: float = 0.0) -> Dict:
+    """Compare pooled keep-alive requests with a fresh connection per call"""
+    sys.path.insert(0, str(Path(__file__).parent))
+    from llm_stub_server import start_stub_server
+    from concurrent.futures import ThreadPoolExecutor
+
+    server, _ = start_stub_server(latency=latency)
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    results = {}
+
+    try:
+        def fresh_connection_call(i):
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+            conn.request("POST", "/api/generate", body=json.dumps({
+                "model": "stub", "prompt": f"prompt {i}", "stream": False
+            }).encode(), headers={"Content-Type": "application/json", "Connection": "close"})
+            conn.getresponse().read()
+            conn.close()
+
+        client = OllamaClient(model="stub", host=host, max_concurrency=workers)
+
+        for label, call in [
+            ('fresh_connection', fresh_connection_call),
+            ('pooled_keep_alive', lambda i: client.generate(f"prompt {i}", format="json"))
+        ]:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(call, range(requests)))
+            elapsed = time.perf_counter() - start
+            results[label] = {
+                'seconds': elapsed,
+                'requests_per_second': requests / elapsed
+            }
+
+        results['connections_opened'] = client.stats['connections_opened']
+        client.close()
+    finally:
+        server.shutdown()
+
+    return results
+
+
+if __name__ == "__main__":
+    print("=== LLM Client Benchmark (stub server) ===")
+    print(json.dumps(benchmark(), indent=2))
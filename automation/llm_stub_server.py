@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+LLM Stub Server - Local stand-in for the ollama HTTP API
+Lets the pooled client be exercised and benchmarked with no model installed
+"""
+
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+class StubModelHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate and /api/tags the way ollama does"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "stub:latest"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        prompt = request.get("prompt", "")
+        if request.get("format") == "json":
+            text = json.dumps({"stub": True, "prompt_chars": len(prompt)})
+        else:
+            text = f"stub response to {len(prompt)} chars"
+
+        self._send_json(200, {
+            "model": request.get("model", "stub"),
+            "created_at": datetime.now().isoformat(),
+            "response": text,
+            "done": True
+        })
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmarks quiet
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0,
+                      latency: float = 0.0) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    """Start the stub server on a background thread (port 0 picks a free port)"""
+    handler = type("ConfiguredStubHandler", (StubModelHandler,), {"latency": latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds to sleep per generate call")
+    args = parser.parse_args()
+
+    server, thread = start_stub_server(args.host, args.port, args.latency)
+    print(f"Stub model server listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        server.shutdown()
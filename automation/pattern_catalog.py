@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Pattern Catalog - Persistent inverted index over patterns/catalog
+Paths, sizes, mtimes and headings live in SQLite and are re-read only for
+files whose size or mtime changed; name and heading tokens, prefixes and
+trigrams are held in memory so lookups never touch the disk. Each refresh
+publishes a new immutable index, so lookups from other threads never see
+a half-rebuilt one.
+"""
+
+import os
+import re
+import sys
+import time
+import json
+import sqlite3
+import bisect
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CATALOG_PATH = Path("/Users/sac/claude-desktop-context/patterns/catalog")
+
+# Every visible file is indexed by name; only these are read for headings
+HEADING_SUFFIXES = {'.md', '.yaml', '.yml'}
+# A stat walk of the catalog is skipped if the last one is this recent
+REFRESH_INTERVAL = 60.0
+FUZZY_CUTOFF = 0.3
+
+TOKEN = re.compile(r'[a-z0-9]+')
+HEADING = re.compile(r'^#+\s*(.+?)\s*#*$|^\s*(?:name|title):\s*["\']?(.+?)["\']?\s*$', re.MULTILINE)
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def name_tokens(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def extract_headings(text: str) -> List[str]:
+    """Markdown headings, YAML title comments and name/title fields"""
+    return [(m.group(1) or m.group(2)) for m in HEADING.finditer(text)][:20]
+
+
+def shared_catalog(catalog_path: Path = CATALOG_PATH) -> 'PatternCatalog':
+    """One catalog per path for every consumer in the process"""
+    key = str(catalog_path)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = PatternCatalog(catalog_path)
+        return _shared[key]
+
+
+class CatalogIndex:
+    """Lookup tables over one generation of catalog entries; never mutated"""
+
+    def __init__(self, entries: Dict[str, Dict]):
+        self.entries = entries
+        self.by_name = defaultdict(list)
+        self.by_token = defaultdict(set)
+        self.by_heading = defaultdict(set)
+        self.by_trigram = defaultdict(set)
+        for path, entry in entries.items():
+            self.by_name[entry['name'].lower()].append(path)
+            for token in name_tokens(entry['name']):
+                self.by_token[token].add(path)
+            for heading in entry['headings']:
+                for token in name_tokens(heading):
+                    self.by_heading[token].add(path)
+        for token in set(self.by_token) | set(self.by_heading):
+            for gram in trigrams(token):
+                self.by_trigram[gram].add(token)
+        self.names = sorted(self.by_name)
+        self.tokens = sorted(self.by_token)
+        self.heading_tokens = sorted(self.by_heading)
+
+
+class PatternCatalog:
+    """Pattern files indexed by name, name and heading tokens, prefix and trigram"""
+
+    def __init__(self, catalog_path: Path = CATALOG_PATH, db_path: Optional[Path] = None):
+        self.catalog_path = Path(catalog_path)
+        self.db_path = Path(db_path) if db_path else self.catalog_path.parent / "cache" / "catalog.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS patterns (
+                    path TEXT PRIMARY KEY,
+                    name TEXT,
+                    category TEXT,
+                    size INTEGER,
+                    mtime REAL,
+                    headings TEXT
+                )
+            """)
+        entries = {}
+        for path, name, category, size, mtime, headings in self._conn.execute("SELECT * FROM patterns"):
+            entries[path] = {'path': path, 'name': name, 'category': category,
+                             'size': size, 'mtime': mtime, 'headings': json.loads(headings)}
+        self.index = CatalogIndex(entries)
+        self.refreshed_at = 0.0
+
+    @property
+    def entries(self) -> Dict[str, Dict]:
+        return self.index.entries
+
+    def __len__(self) -> int:
+        return len(self.index.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self.index.by_name
+
+    def refresh(self, force: bool = False) -> int:
+        """Re-index files added, changed or removed since the last refresh"""
+        if not force and time.time() - self.refreshed_at < REFRESH_INTERVAL:
+            return 0
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        current = {}
+        if self.catalog_path.exists():
+            for root, dirs, files in os.walk(self.catalog_path):
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                for file in files:
+                    if file.startswith('.'):
+                        continue
+                    path = os.path.join(root, file)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue  # Deleted during the walk
+                    current[path] = (stat.st_size, stat.st_mtime)
+
+        previous = self.index.entries
+        changed = [p for p, (size, mtime) in current.items()
+                   if p not in previous or (previous[p]['size'], previous[p]['mtime']) != (size, mtime)]
+        removed = [p for p in previous if p not in current]
+
+        if changed or removed:
+            entries = {p: entry for p, entry in previous.items() if p in current}
+            with self._conn:
+                self._conn.executemany("DELETE FROM patterns WHERE path = ?", [(p,) for p in removed])
+                for path in changed:
+                    size, mtime = current[path]
+                    headings = []
+                    if os.path.splitext(path)[1] in HEADING_SUFFIXES:
+                        try:
+                            with open(path, errors='replace') as f:
+                                headings = extract_headings(f.read())
+                        except OSError:
+                            pass
+                    entry = {
+                        'path': path,
+                        'name': Path(path).stem,
+                        'category': os.path.relpath(os.path.dirname(path), self.catalog_path),
+                        'size': size,
+                        'mtime': mtime,
+                        'headings': headings
+                    }
+                    entries[path] = entry
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO patterns VALUES (?, ?, ?, ?, ?, ?)",
+                        (path, entry['name'], entry['category'], size, mtime, json.dumps(headings))
+                    )
+            # One assignment publishes the new generation to concurrent readers
+            self.index = CatalogIndex(entries)
+
+        self.refreshed_at = time.time()
+        return len(changed) + len(removed)
+
+    def exact(self, name: str) -> List[Dict]:
+        """Patterns whose file name (without suffix) is name"""
+        index = self.index
+        return [index.entries[p] for p in sorted(index.by_name.get(name.lower(), ()))]
+
+    def prefix(self, text: str, limit: int = 10) -> List[Dict]:
+        """Patterns whose name, a name token, then a heading token starts with text"""
+        index = self.index
+        return self._prefix(text, limit, ((index.names, index.by_name), (index.tokens, index.by_token),
+                                          (index.heading_tokens, index.by_heading)))
+
+    def name_prefix(self, text: str, limit: int = 10) -> List[Dict]:
+        """Patterns whose name or a name token starts with text"""
+        index = self.index
+        return self._prefix(text, limit, ((index.names, index.by_name), (index.tokens, index.by_token)))
+
+    def heading_prefix(self, text: str, limit: int = 10) -> List[Dict]:
+        """Patterns with a heading token that starts with text"""
+        index = self.index
+        return self._prefix(text, limit, ((index.heading_tokens, index.by_heading),))
+
+    def _prefix(self, text: str, limit: int, tables) -> List[Dict]:
+        index = self.index
+        text = text.lower()
+        paths = []
+        for names, lookup in tables:
+            i = bisect.bisect_left(names, text)
+            while i < len(names) and names[i].startswith(text) and len(paths) < limit:
+                paths.extend(p for p in sorted(lookup[names[i]]) if p not in paths)
+                i += 1
+        return [index.entries[p] for p in paths[:limit]]
+
+    def substring(self, text: str, limit: int = 10) -> List[Dict]:
+        """Patterns whose file name contains text"""
+        index = self.index
+        text = text.lower()
+        paths = [p for p in sorted(index.entries) if text in os.path.basename(p).lower()]
+        return [index.entries[p] for p in paths[:limit]]
+
+    def fuzzy(self, text: str, limit: int = 5, cutoff: float = FUZZY_CUTOFF) -> List[Dict]:
+        """Patterns ranked by trigram similarity of their name and heading tokens to text"""
+        index = self.index
+        scores = Counter()
+        for query in name_tokens(text):
+            query_grams = trigrams(query)
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(index.by_trigram.get(gram, ()))
+            best = {}
+            for token, overlap in shared.items():
+                similarity = overlap / (len(query_grams) + len(trigrams(token)) - overlap)
+                if similarity >= cutoff:
+                    for path in index.by_token.get(token, set()) | index.by_heading.get(token, set()):
+                        best[path] = max(best.get(path, 0.0), similarity)
+            # Every query token adds its best match, so multi-word names rank whole matches first
+            scores.update(best)
+        return [index.entries[p] for p, _ in scores.most_common(limit)]
+
+    def find(self, name: str, fuzzy: bool = False) -> Optional[str]:
+        """Best path for a pattern name
+
+        Name matches come first (exact, name prefix, then file name substring,
+        which covers everything the old directory walk found); headings are
+        only consulted after them, and fuzzy matching only if asked.
+        """
+        self.refresh()
+        lookups = [self.exact, self.name_prefix, self.substring, self.heading_prefix]
+        if fuzzy:
+            lookups.append(self.fuzzy)
+        for lookup in lookups:
+            found = lookup(name)
+            if found:
+                return found[0]['path']
+        return None
+
+    def paths(self) -> List[str]:
+        self.refresh()
+        return sorted(self.index.entries)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    catalog = PatternCatalog(Path(sys.argv[1]) if len(sys.argv) > 1 else CATALOG_PATH)
+    catalog.refresh(force=True)
+    for path in catalog.paths():
+        entry = catalog.entries[path]
+        print(f"{entry['category']:<20} {entry['name']:<40} {entry['size']:>8}  {', '.join(entry['headings'][:2])}")
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Preload Cache - Two-tier cache for predictively preloaded context
+A small in-memory hot tier over one on-disk file whose fixed-layout hash
+index maps a name to (offset, length, score), so readers find an entry
+with one probe into an mmap and never parse the whole cache
+
+Layout:
+    header   b"CDPC" + version u16 + slots u32 + count u32 + built_at f64
+    slots    [name_hash u64][offset u64][name_len u32][value_len u32][score f32] x slots
+    ranked   slot number u32 x count, highest score first
+    data     [name][value] ...
+
+Slots are open-addressed (linear probing) on the name hash; a hash of 0
+marks an empty slot. The whole file is rebuilt into a temporary file and
+renamed on commit, so readers always see one complete generation.
+"""
+
+import os
+import mmap
+import time
+import struct
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"CDPC"
+VERSION = 1
+HEADER = struct.Struct("<4sHIId")
+SLOT = struct.Struct("<QQIIf")
+RANK = struct.Struct("<I")
+
+HOT_BYTES = 256 * 1024
+DISK_BYTES = 16 * 1024 * 1024
+# Scores of entries carried over from earlier cycles shrink each commit,
+# so predictions that stop recurring lose their place to fresh ones
+SCORE_DECAY = 0.5
+
+
+def name_hash(name: str) -> int:
+    """Non-zero 64-bit hash of an entry name"""
+    value = int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), 'little')
+    return value or 1
+
+
+def value_per_byte(score: float, name: str, value: bytes) -> float:
+    return score / (len(name.encode()) + len(value) or 1)
+
+
+class PreloadCache:
+    """Hot dict tier plus an mmap'd on-disk tier evicted by value per byte"""
+
+    def __init__(self, path: Path, hot_bytes: int = HOT_BYTES, disk_bytes: int = DISK_BYTES):
+        self.path = Path(path)
+        self.hot_bytes = hot_bytes
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._map = None
+        self._inode = None
+        self._slots = 0
+        self._count = 0
+        self.built_at = 0.0
+        self.hot: Dict[str, Tuple[bytes, float]] = {}
+        self._hot_size = 0
+        self.pending: Dict[str, Tuple[bytes, float]] = {}
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Map the current generation of the cache file; True if it changed"""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return False
+            inode = (stat.st_ino, stat.st_mtime_ns)
+            if inode == self._inode:
+                return False
+            mapped = self._map_valid(stat.st_size)
+            if self._map is not None:
+                self._map.close()
+            # A short, foreign or truncated file reads as an empty cache
+            self._map, self._inode = mapped, inode
+            if mapped is None:
+                self._slots, self._count, self.built_at = 0, 0, 0.0
+            else:
+                _, _, self._slots, self._count, self.built_at = HEADER.unpack_from(mapped, 0)
+            self.hot.clear()
+            self._hot_size = 0
+            return True
+
+    def _map_valid(self, size: int) -> Optional[mmap.mmap]:
+        """Map of the cache file if its header and tables fit, else None"""
+        if size < HEADER.size:
+            return None
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, slots, count, _ = HEADER.unpack_from(mapped, 0)
+        valid = (magic == MAGIC and version == VERSION and slots & (slots - 1) == 0
+                 and count <= slots and HEADER.size + slots * SLOT.size + count * RANK.size <= size)
+        if not valid:
+            mapped.close()
+            return None
+        return mapped
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _slot(self, index: int) -> Tuple[int, int, int, int, float]:
+        return SLOT.unpack_from(self._map, HEADER.size + index * SLOT.size)
+
+    def _name(self, offset: int, name_len: int) -> str:
+        return self._map[offset:offset + name_len].decode()
+
+    def _locate(self, name: str) -> Optional[Tuple[int, int, float]]:
+        if self._map is None or not self._slots:
+            return None
+        target = name_hash(name)
+        encoded = name.encode()
+        index = target & (self._slots - 1)
+        while True:
+            hashed, offset, name_len, value_len, score = self._slot(index)
+            if hashed == 0:
+                return None
+            if hashed == target and self._map[offset:offset + name_len] == encoded:
+                return offset + name_len, value_len, score
+            index = (index + 1) & (self._slots - 1)
+
+    def lookup(self, name: str) -> Optional[Tuple[int, int, float]]:
+        """(value offset, value length, score) from the on-disk index"""
+        with self._lock:
+            return self._locate(name)
+
+    def _read_disk(self, name: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            location = self._locate(name)
+            if location is None:
+                return None
+            offset, length, score = location
+            return self._map[offset:offset + length], score
+
+    def get(self, name: str) -> Optional[bytes]:
+        """Entry value, from the hot tier when present"""
+        if name in self.hot:
+            return self.hot[name][0]
+        found = self._read_disk(name)
+        if found is None:
+            return None
+        self._promote(name, *found)
+        return found[0]
+
+    def get_text(self, name: str) -> Optional[str]:
+        value = self.get(name)
+        return None if value is None else value.decode('utf-8', errors='replace')
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.hot or self.lookup(name) is not None
+
+    def top(self, k: int = 10, prefix: str = '') -> List[Tuple[str, float]]:
+        """(name, score) of the highest-scoring entries, optionally by name prefix"""
+        results = []
+        with self._lock:
+            if self._map is None:
+                return results
+            ranked_start = HEADER.size + self._slots * SLOT.size
+            for rank in range(self._count):
+                slot = RANK.unpack_from(self._map, ranked_start + rank * RANK.size)[0]
+                _, offset, name_len, _, score = self._slot(slot)
+                name = self._name(offset, name_len)
+                if name.startswith(prefix):
+                    results.append((name, score))
+                    if len(results) >= k:
+                        break
+        return results
+
+    def iter_entries(self) -> Iterator[Tuple[str, bytes, float]]:
+        """Every on-disk entry in slot order"""
+        with self._lock:
+            if self._map is None:
+                return
+            entries = []
+            for index in range(self._slots):
+                hashed, offset, name_len, value_len, score = self._slot(index)
+                if hashed:
+                    start = offset + name_len
+                    entries.append((self._name(offset, name_len),
+                                    self._map[start:start + value_len], score))
+        yield from entries
+
+    def _promote(self, name: str, value: bytes, score: float):
+        """Keep an entry in memory, evicting the lowest value per byte when full"""
+        size = len(value)
+        if size > self.hot_bytes:
+            return
+        self.hot[name] = (value, score)
+        self._hot_size += size
+        while self._hot_size > self.hot_bytes:
+            coldest = min(self.hot, key=lambda n: value_per_byte(self.hot[n][1], n, self.hot[n][0]))
+            self._hot_size -= len(self.hot.pop(coldest)[0])
+
+    def put(self, name: str, value, score: float):
+        """Stage an entry for the next commit (and serve it from memory now)"""
+        if isinstance(value, str):
+            value = value.encode()
+        if name in self.hot:
+            self._hot_size -= len(self.hot.pop(name)[0])
+        self.pending[name] = (bytes(value), float(score))
+        self._promote(name, bytes(value), float(score))
+
+    def commit(self, decay: float = SCORE_DECAY) -> Dict[str, int]:
+        """Merge staged entries into the on-disk tier and evict down to disk_bytes
+
+        Carried-over entries keep their decayed score; staged entries replace
+        them. Entries are kept greedily by score per byte until the byte
+        budget is spent.
+        """
+        entries = {name: (value, score * decay) for name, value, score in self.iter_entries()}
+        entries.update(self.pending)
+
+        ranked = sorted(entries.items(), key=lambda item: value_per_byte(item[1][1], item[0], item[1][0]),
+                        reverse=True)
+        kept, used = [], 0
+        for name, (value, score) in ranked:
+            size = len(name.encode()) + len(value)
+            if used + size <= self.disk_bytes:
+                kept.append((name, value, score))
+                used += size
+
+        self._write(kept)
+        evicted = len(entries) - len(kept)
+        self.pending.clear()
+        self.refresh()
+        for name, value, score in kept:
+            if self._hot_size + len(value) > self.hot_bytes:
+                break
+            self._promote(name, value, score)
+        return {'entries': len(kept), 'bytes': used, 'evicted': evicted, 'hot_entries': len(self.hot)}
+
+    def _write(self, entries: List[Tuple[str, bytes, float]]):
+        slots = 16
+        while slots < 2 * len(entries):
+            slots *= 2
+
+        table = [None] * slots
+        data = bytearray()
+        data_start = HEADER.size + slots * SLOT.size + len(entries) * RANK.size
+        slot_of = {}
+        for name, value, score in entries:
+            encoded = name.encode()
+            hashed = name_hash(name)
+            index = hashed & (slots - 1)
+            while table[index] is not None:
+                index = (index + 1) & (slots - 1)
+            table[index] = (hashed, data_start + len(data), len(encoded), len(value), score)
+            slot_of[name] = index
+            data += encoded
+            data += value
+
+        by_score = sorted(entries, key=lambda entry: entry[2], reverse=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, slots, len(entries), time.time()))
+            for slot in table:
+                f.write(SLOT.pack(*slot) if slot else bytes(SLOT.size))
+            for name, _, _ in by_score:
+                f.write(RANK.pack(slot_of[name]))
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'entries': self._count,
+            'slots': self._slots,
+            'file_bytes': self.path.stat().st_size if self.path.exists() else 0,
+            'hot_entries': len(self.hot),
+            'hot_bytes': self._hot_size,
+            'built_at': self.built_at
+        }
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+                self._inode = None
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Quantile Sketch - Mergeable streaming quantiles with bounded relative error
+Values are counted in logarithmic buckets (bucket k holds magnitudes in
+(gamma^(k-1), gamma^k]) like an HDR histogram, so adding a value is a bucket
+increment, merging two sketches adds their counts, and every quantile is
+within the configured relative error of the exact one
+"""
+
+import math
+import struct
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Relative error bound of reported quantiles
+DEFAULT_ACCURACY = 0.01
+# Magnitudes below this are counted as zero
+MIN_MAGNITUDE = 1e-9
+# accuracy, count, sum, min, max, zero count, positive buckets, negative buckets
+HEADER = struct.Struct("<dQdddQII")
+
+Buckets = Tuple[np.ndarray, np.ndarray]
+
+
+def _empty() -> Buckets:
+    return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.uint64)
+
+
+def _merged(a: Buckets, b: Buckets) -> Buckets:
+    """Sorted bucket keys with the counts of both inputs summed"""
+    if not len(a[0]):
+        return b
+    keys, inverse = np.unique(np.concatenate([a[0], b[0]]), return_inverse=True)
+    counts = np.zeros(len(keys), dtype=np.uint64)
+    np.add.at(counts, inverse, np.concatenate([a[1], b[1]]))
+    return keys.astype(np.int32), counts
+
+
+class QuantileSketch:
+    """Sparse log-bucketed histogram of a value stream"""
+
+    def __init__(self, accuracy: float = DEFAULT_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.zero_count = 0
+        self.positive = _empty()
+        self.negative = _empty()
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def _bucketed(self, magnitudes: np.ndarray) -> Buckets:
+        keys = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int32)
+        keys, counts = np.unique(keys, return_counts=True)
+        return keys, counts.astype(np.uint64)
+
+    def add(self, values):
+        """Count one value or a batch of values"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        magnitudes = np.abs(values)
+        significant = magnitudes >= MIN_MAGNITUDE
+        self.zero_count += int(len(values) - np.count_nonzero(significant))
+        positive = magnitudes[significant & (values > 0)]
+        negative = magnitudes[significant & (values < 0)]
+        if len(positive):
+            self.positive = _merged(self.positive, self._bucketed(positive))
+        if len(negative):
+            self.negative = _merged(self.negative, self._bucketed(negative))
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """Fold another sketch's counts into this one"""
+        if other.accuracy != self.accuracy:
+            raise ValueError(f"Cannot merge sketches of accuracy {other.accuracy} and {self.accuracy}")
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.zero_count += other.zero_count
+        self.positive = _merged(self.positive, other.positive)
+        self.negative = _merged(self.negative, other.negative)
+        return self
+
+    def _representative(self, keys: np.ndarray) -> np.ndarray:
+        """Value reported for a bucket; within accuracy of anything in it"""
+        return 2 * self.gamma ** keys.astype(np.float64) / (self.gamma + 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at rank int(count * q), as sorted(values)[int(len(values) * q)]"""
+        return self.quantiles(q)[0]
+
+    def quantiles(self, *qs: float) -> List[Optional[float]]:
+        """Several quantiles from one pass over the buckets"""
+        if not self.count:
+            return [None] * len(qs)
+        ranks = [min(int(self.count * q), self.count - 1) for q in qs]
+        negative_keys, negative_counts = self.negative
+        positive_keys, positive_counts = self.positive
+        # Most negative first: larger magnitude buckets of the negative side lead
+        values = np.concatenate([-self._representative(negative_keys[::-1]), [0.0],
+                                 self._representative(positive_keys)])
+        counts = np.concatenate([negative_counts[::-1], [self.zero_count], positive_counts])
+        indexes = np.searchsorted(np.cumsum(counts), ranks, side='right')
+        return [float(min(max(values[i], self.min), self.max)) for i in indexes.tolist()]
+
+    def to_bytes(self) -> bytes:
+        header = HEADER.pack(self.accuracy, self.count, self.sum, self.min, self.max,
+                             self.zero_count, len(self.positive[0]), len(self.negative[0]))
+        return b''.join([header, self.positive[0].tobytes(), self.positive[1].tobytes(),
+                         self.negative[0].tobytes(), self.negative[1].tobytes()])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'QuantileSketch':
+        accuracy, count, total, low, high, zeros, positive, negative = HEADER.unpack_from(data, 0)
+        sketch = cls(accuracy)
+        sketch.count, sketch.sum, sketch.min, sketch.max, sketch.zero_count = count, total, low, high, zeros
+        offset = HEADER.size
+        buckets = []
+        for size in (positive, negative):
+            keys = np.frombuffer(data, dtype=np.int32, count=size, offset=offset)
+            offset += keys.nbytes
+            counts = np.frombuffer(data, dtype=np.uint64, count=size, offset=offset)
+            offset += counts.nbytes
+            buckets.append((keys.copy(), counts.copy()))
+        sketch.positive, sketch.negative = buckets
+        return sketch
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Session Archive - Append-only binary archive of compressed sessions
+Sessions are stored as independently compressed blocks followed by a footer
+index, so any session or block is read through mmap without inflating the rest
+
+Layout:
+    header   b"CDAR" + version byte
+    blocks   [codec u8][raw_len u32][crc32 u32][payload] ...
+    index    zlib(JSON {name: entry})
+    trailer  b"CDAI" + index_offset u64 + index_len u32
+
+Each append writes new blocks and a fresh index/trailer after the old ones;
+nothing already written is modified, so a crash mid-append leaves the
+previous trailer (and every session it indexes) intact. The superseded
+index stays behind as dead bytes, so bulk writers use append_many, which
+writes one index for the whole batch.
+
+Entries are named "<kind>/<path relative to the sessions directory>", so
+an original session and anything derived from it never share a name.
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import zlib
+import fcntl
+import struct
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from automation.text_stats import text_stats
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+MAGIC = b"CDAR\x01"
+TRAILER_MAGIC = b"CDAI"
+TRAILER = struct.Struct("<4sQI")
+BLOCK_HEADER = struct.Struct("<BII")
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+# Random-access granularity: reading one block inflates at most this much
+BLOCK_SIZE = 64 * 1024
+
+# First bytes of the file left in place of a session once it is archived
+POINTER_MARKER = b"COMPRESSED TO: "
+
+
+def entry_name(kind: str, name: str) -> str:
+    """Archive name of a file of one kind, given its path relative to the sessions directory"""
+    return f"{kind}/{name}"
+
+
+def is_pointer(path: Path) -> bool:
+    """Whether a session file is only the pointer to its archived original"""
+    with open(path, 'rb') as f:
+        return f.read(len(POINTER_MARKER)) == POINTER_MARKER
+
+
+def _compress(data: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, 6)
+    return data
+
+
+def _decompress(payload, codec: int, raw_len: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        if not HAS_ZSTD:
+            raise RuntimeError("Archive block uses zstd but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload, max_output_size=raw_len)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    return bytes(payload)
+
+
+class SessionArchive:
+    """Append-only archive with a footer index of per-session block offsets"""
+
+    def __init__(self, path: Path, block_size: int = BLOCK_SIZE, codec: Optional[int] = None):
+        self.path = Path(path)
+        self.block_size = block_size
+        self.codec = codec if codec is not None else (CODEC_ZSTD if HAS_ZSTD else CODEC_ZLIB)
+        self._lock = threading.Lock()
+        self._map = None
+        self._map_size = 0
+        self.index = {}
+        self._index_offset = len(MAGIC)
+        self.reload()
+
+    def _mapped(self) -> Optional[mmap.mmap]:
+        """Read-only map of the archive, remapped when another writer appended"""
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size <= len(MAGIC):
+            return None
+        if self._map is None or size != self._map_size:
+            if self._map is not None:
+                self._map.close()
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map_size = size
+        return self._map
+
+    def reload(self):
+        """Load the index named by the last trailer"""
+        with self._lock:
+            self._read_index()
+
+    def _read_index(self):
+        view = self._mapped()
+        if view is None:
+            self.index, self._index_offset = {}, len(MAGIC)
+            return
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a session archive")
+
+        # Normally the trailer is the last thing in the file; after a torn
+        # append, fall back to the latest trailer that still validates
+        end = len(view)
+        while end > len(MAGIC):
+            position = view.rfind(TRAILER_MAGIC, len(MAGIC), end)
+            if position < 0:
+                break
+            if position + TRAILER.size <= len(view):
+                _, offset, length = TRAILER.unpack_from(view, position)
+                if offset + length == position:
+                    try:
+                        self.index = json.loads(zlib.decompress(view[offset:position]))
+                        self._index_offset = offset
+                        return
+                    except (zlib.error, ValueError):
+                        pass
+            end = position + len(TRAILER_MAGIC) - 1
+        raise ValueError(f"{self.path} has no valid index trailer")
+
+    def append(self, name: str, data: bytes, kind: str = "session", **metadata) -> Dict:
+        """Store data under name (replacing any earlier entry) and return its index entry"""
+        return self.append_many([(name, data, metadata)], kind=kind)[0]
+
+    def append_many(self, items: Iterable[Tuple[str, bytes, Dict]], kind: str = "session") -> List[Dict]:
+        """Store (name, data, metadata) items, writing the index once after all of them
+
+        Items are consumed lazily, so callers can stream file contents. No item
+        is reachable (or durable) until the batch's trailer is written.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        entries = []
+
+        with self._lock, open(self.path, 'ab+') as f:
+            # Other processes (e.g. the self-healing loop) append to the same file
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                self._read_index()
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    f.write(MAGIC)
+
+                for name, data, metadata in items:
+                    metadata = dict(metadata)
+                    entry_kind = metadata.pop('kind', kind)
+                    entries.append(self._write_entry(f, name, data, entry_kind, metadata))
+                if not entries:
+                    return entries
+
+                index_bytes = zlib.compress(json.dumps(self.index).encode())
+                index_offset = f.tell()
+                f.write(index_bytes)
+                f.write(TRAILER.pack(TRAILER_MAGIC, index_offset, len(index_bytes)))
+                f.flush()
+                os.fsync(f.fileno())
+                self._index_offset = index_offset
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+        return entries
+
+    def _write_entry(self, f, name: str, data: bytes, kind: str, metadata: Dict) -> Dict:
+        """Write one item's blocks at the end of f and record it in the in-memory index"""
+        if isinstance(data, str):
+            data = data.encode()
+        stats = text_stats(data)
+
+        blocks = []
+        stored = 0
+        for start in range(0, len(data), self.block_size):
+            raw = data[start:start + self.block_size]
+            payload = _compress(raw, self.codec)
+            codec = self.codec
+            if len(payload) >= len(raw):
+                payload, codec = raw, CODEC_RAW  # Incompressible block
+            offset = f.tell()
+            f.write(BLOCK_HEADER.pack(codec, len(raw), zlib.crc32(raw)))
+            f.write(payload)
+            blocks.append([offset, BLOCK_HEADER.size + len(payload)])
+            stored += BLOCK_HEADER.size + len(payload)
+
+        entry = dict(metadata)
+        entry.update({
+            'kind': kind,
+            'original_size': metadata.get('original_size', len(data)),
+            'size': len(data),
+            'stored_size': stored,
+            'entropy': stats.entropy,
+            'lines': stats.lines,
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'archived_at': time.time(),
+            'blocks': blocks
+        })
+        self.index[name] = entry
+        return entry
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def entries(self, kind: Optional[str] = None) -> Dict[str, Dict]:
+        """Index entries, optionally only those of one kind"""
+        return {name: entry for name, entry in self.index.items()
+                if kind is None or entry['kind'] == kind}
+
+    def _read_block(self, view, offset: int, length: int) -> bytes:
+        codec, raw_len, crc = BLOCK_HEADER.unpack_from(view, offset)
+        raw = _decompress(view[offset + BLOCK_HEADER.size:offset + length], codec, raw_len)
+        if zlib.crc32(raw) != crc:
+            raise ValueError(f"Corrupt block at offset {offset} in {self.path}")
+        return raw
+
+    def read_block(self, name: str, block: int) -> bytes:
+        """One block of a stored entry, inflating nothing else"""
+        with self._lock:
+            offset, length = self.index[name]['blocks'][block]
+            return self._read_block(self._mapped(), offset, length)
+
+    def iter_blocks(self, name: str) -> Iterator[bytes]:
+        for block in range(len(self.index[name]['blocks'])):
+            yield self.read_block(name, block)
+
+    def read(self, name: str) -> bytes:
+        """Full contents of a stored entry"""
+        return b''.join(self.iter_blocks(name))
+
+    def stats(self, kind: Optional[str] = None) -> Dict:
+        """Aggregate sizes straight from the index"""
+        entries = self.entries(kind).values()
+        original = sum(e['original_size'] for e in entries)
+        size = sum(e['size'] for e in entries)
+        stored = sum(e['stored_size'] for e in entries)
+        return {
+            'entries': len(entries),
+            'original_bytes': original,
+            'bytes': size,
+            'stored_bytes': stored,
+            'archive_bytes': self.path.stat().st_size if self.path.exists() else 0,
+            'compression_ratio': original / size if size else 1.0,
+            'storage_ratio': size / stored if stored else 1.0
+        }
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+if __name__ == "__main__":
+    # Print the index of an archive: python3 session_archive.py <path>
+    archive = SessionArchive(Path(sys.argv[1]))
+    for name, entry in sorted(archive.entries().items()):
+        print(f"{entry['kind']:8} {name:50} {entry['size']:>10} -> {entry['stored_size']:>10} "
+              f"entropy={entry['entropy']:.2f}")
+    print(json.dumps(archive.stats(), indent=2))
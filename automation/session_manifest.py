@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Session Manifest - Incremental scanner for memory/sessions
+Persists path, mtime, size, content hash, entropy and line count so only
+new or changed session files are ever read
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from automation.text_stats import text_stats
+
+
+class SessionRecord(dict):
+    """Session metadata whose 'content' is read from disk on first access"""
+
+    def __init__(self, path: Path, **metadata):
+        super().__init__(metadata)
+        self.path = path
+
+    def __missing__(self, key):
+        if key != 'content':
+            raise KeyError(key)
+        content = self.path.read_text()
+        self['content'] = content
+        return content
+
+
+class SessionManifest:
+    """mtime/size keyed manifest of session statistics"""
+
+    def __init__(self, sessions_path: Path, manifest_path: Path, pattern: str = "*.md"):
+        self.sessions_path = Path(sessions_path)
+        self.manifest_path = Path(manifest_path)
+        self.pattern = pattern
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if self.manifest_path.exists():
+            try:
+                return json.loads(self.manifest_path.read_text())
+            except ValueError:
+                pass  # Corrupt manifest - rebuild from scratch
+        return {}
+
+    def _save(self):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.entries))
+        os.replace(tmp_path, self.manifest_path)
+
+    def _scan_file(self, path: Path, stat: os.stat_result) -> Dict:
+        data = path.read_bytes()
+        stats = text_stats(data)
+        return {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'entropy': stats.entropy,
+            'lines': stats.lines
+        }
+
+    def refresh(self) -> Dict[str, int]:
+        """Stat every session file and re-read only the ones that changed"""
+        counts = {'scanned': 0, 'updated': 0, 'removed': 0}
+
+        with self._lock:
+            seen = set()
+            for path in self.sessions_path.glob(self.pattern):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue  # Moved away by the memory optimizer mid-scan
+                if not path.is_file():
+                    continue
+
+                counts['scanned'] += 1
+                seen.add(path.name)
+                entry = self.entries.get(path.name)
+                if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+                    continue
+
+                try:
+                    self.entries[path.name] = self._scan_file(path, stat)
+                except FileNotFoundError:
+                    continue
+                counts['updated'] += 1
+
+            for name in set(self.entries) - seen:
+                del self.entries[name]
+                counts['removed'] += 1
+
+            if counts['updated'] or counts['removed']:
+                self._save()
+
+        return counts
+
+    def iter_sessions(self, since: Optional[float] = None) -> Iterator[SessionRecord]:
+        """Yield lazily-loaded records newest file name first"""
+        with self._lock:
+            entries = sorted(self.entries.items(), reverse=True)
+
+        for name, entry in entries:
+            if since is not None and entry['mtime'] <= since:
+                continue
+            yield SessionRecord(
+                self.sessions_path / name,
+                file=name,
+                entropy=entry['entropy'],
+                lines=entry['lines'],
+                size=entry['size'],
+                sha256=entry['sha256'],
+                mtime=entry['mtime']
+            )
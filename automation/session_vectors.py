@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Session Vectors - Memory-mapped matrix of L2-normalized session vectors
+Similarity search is one matrix-vector product plus argpartition for top-k
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Iterable, Tuple
+
+import numpy as np
+
+INITIAL_CAPACITY = 1024
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows stay zero)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class SessionVectorStore:
+    """Preallocated float32 (capacity, dim) .npy memmap that doubles when full"""
+
+    def __init__(self, path: Path, dim: int = 384, initial_capacity: int = INITIAL_CAPACITY):
+        self.path = Path(path)
+        self.meta_path = self.path.with_suffix('.json')
+        self.dim = dim
+        self.count = 0
+        capacity = initial_capacity
+
+        if self.meta_path.exists() and self.path.exists():
+            meta = json.loads(self.meta_path.read_text())
+            self.count, self.dim = meta['count'], meta['dim']
+            self.matrix = np.load(self.path, mmap_mode='r+')
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.matrix = np.lib.format.open_memmap(
+                self.path, mode='w+', dtype=np.float32, shape=(capacity, self.dim))
+            self._save_meta()
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the filled rows"""
+        return self.matrix[:self.count]
+
+    def _save_meta(self):
+        tmp_path = self.meta_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({'count': self.count, 'dim': self.dim}))
+        os.replace(tmp_path, self.meta_path)
+
+    def fit(self, vectors) -> np.ndarray:
+        """Pad or truncate each vector to dim and normalize"""
+        if isinstance(vectors, np.ndarray):
+            vectors = np.atleast_2d(vectors)
+        fitted = np.zeros((len(vectors), self.dim), dtype=np.float32)
+        # Vectors may differ in length, so they are fitted one row at a time
+        for row, vector in enumerate(vectors):
+            vector = np.asarray(vector, dtype=np.float32).ravel()[:self.dim]
+            fitted[row, :len(vector)] = vector
+        return normalize(fitted)
+
+    def _grow(self, needed: int):
+        capacity = len(self.matrix)
+        while capacity < needed:
+            capacity *= 2
+        tmp_path = self.path.with_name(self.path.stem + '.grow.npy')
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                          shape=(capacity, self.dim))
+        grown[:self.count] = self.matrix[:self.count]
+        grown.flush()
+        del grown, self.matrix
+        os.replace(tmp_path, self.path)
+        self.matrix = np.load(self.path, mmap_mode='r+')
+
+    def extend(self, vectors: Iterable) -> range:
+        """Append vectors; returns their row numbers"""
+        rows = self.fit(list(vectors))
+        if self.count + len(rows) > len(self.matrix):
+            self._grow(self.count + len(rows))
+        start = self.count
+        self.matrix[start:start + len(rows)] = rows
+        self.matrix.flush()
+        self.count += len(rows)
+        self._save_meta()
+        return range(start, self.count)
+
+    def append(self, vector) -> int:
+        return self.extend([vector])[0]
+
+    def top_k(self, query, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, cosine similarities) of the k most similar vectors, best first"""
+        if not self.count or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        similarities = self.vectors @ self.fit([query])[0]
+        if k < self.count:
+            rows = np.argpartition(-similarities, k - 1)[:k]
+        else:
+            rows = np.arange(self.count)
+        rows = rows[np.argsort(-similarities[rows], kind='stable')]
+        return rows, similarities[rows]
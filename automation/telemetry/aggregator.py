@@ -12,12 +12,13 @@ import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
-from collections import defaultdict, deque
-import statistics
+from collections import defaultdict
 import logging
 from dataclasses import dataclass
 import threading
 
+import numpy as np
+
 # Try to import visualization libraries
 try:
     import matplotlib.pyplot as plt
@@ -33,6 +34,22 @@ sys.path.append(str(CDCS_PATH / "automation"))
 sys.path.append(str(CDCS_PATH / "automation" / "advanced_loops"))
 
 from otel_base_agent import OTelBaseAgent, instrument_function
+from quantile_sketch import QuantileSketch
+
+METRIC_BUFFER_SIZE = 1000
+TRACE_BUFFER_SIZE = 500
+# Alerts are re-evaluated from the ingest path at most this often
+ALERT_CHECK_INTERVAL = 30.0
+# Each window is rolled up from sketches of the next smaller one
+ROLLUP_SOURCES = {'5m': '1m', '15m': '5m', '1h': '15m', '24h': '1h'}
+# Minutes stay open this long for late points before their sketches are stored
+LATE_POINT_GRACE = timedelta(minutes=1)
+# Values buffered per open minute and series before being folded into its sketch
+SKETCH_BATCH = 4096
+
+def canonical_labels(labels: Optional[Dict]) -> str:
+    """Stable JSON form of a label set, used as its interning key"""
+    return json.dumps(labels or {}, sort_keys=True, separators=(',', ':'), default=str)
 
 @dataclass
 class MetricPoint:
@@ -52,23 +69,63 @@ class TraceSpan:
     duration_ms: float
     status: str
     attributes: Dict[str, Any]
+
+class RingBuffer:
+    """Fixed-capacity columnar buffer; the newest rows overwrite the oldest"""
+    
+    def __init__(self, capacity: int, **dtypes):
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in dtypes.items()}
+        self.written = 0
+        
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+        
+    def extend(self, **values):
+        """Append equal-length columns of new rows"""
+        count = len(next(iter(values.values())))
+        skipped = max(count - self.capacity, 0)
+        positions = (self.written + skipped + np.arange(count - skipped)) % self.capacity
+        for name, column in values.items():
+            self.columns[name][positions] = np.asarray(column)[skipped:]
+        self.written += count
+        
+    def column(self, name: str, last: Optional[int] = None) -> np.ndarray:
+        """Column values oldest first, optionally only the newest rows"""
+        count = len(self) if last is None else min(last, len(self))
+        positions = (self.written - count + np.arange(count)) % self.capacity
+        return self.columns[name][positions]
     
 class TelemetryAggregator(OTelBaseAgent):
     """
     Aggregates and analyzes telemetry data from CDCS automation components
     """
     
-    def __init__(self, orchestrator):
+    def __init__(self, orchestrator, telemetry_db: Optional[Path] = None):
         super().__init__(orchestrator, "TelemetryAggregator")
-        self.telemetry_db = CDCS_PATH / "automation" / "telemetry" / "aggregated_metrics.db"
+        self.telemetry_db = telemetry_db or CDCS_PATH / "automation" / "telemetry" / "aggregated_metrics.db"
         self.init_telemetry_db()
         
-        # In-memory stores for real-time analysis
-        self.metric_buffers = defaultdict(lambda: deque(maxlen=1000))
-        self.trace_buffer = deque(maxlen=500)
+        # Ingest keeps one connection; label sets are interned to integer ids
+        self.conn = sqlite3.connect(self.telemetry_db, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.ingest_lock = threading.Lock()
+        self.label_texts = dict(self.conn.execute('SELECT id, labels FROM label_sets'))
+        self.label_ids = {text: i for i, text in self.label_texts.items()}
+        self._label_keys = {}
+        
+        # Columnar ring buffers for real-time analysis
+        self.metric_buffers = defaultdict(lambda: RingBuffer(
+            METRIC_BUFFER_SIZE, timestamp=np.float64, value=np.float64, label_set=np.int32))
+        self.trace_buffer = RingBuffer(TRACE_BUFFER_SIZE, start_time=np.float64,
+                                       duration_ms=np.float64, name=np.int32)
+        self.span_names = []
+        self.span_name_ids = {}
         self.alert_conditions = self.load_alert_conditions()
+        self.alerts_checked_at = 0.0
         
-        # Aggregation state
+        # Aggregation state: open minute sketches keyed by (minute, metric, label set)
         self.aggregation_windows = {
             '1m': timedelta(minutes=1),
             '5m': timedelta(minutes=5),
@@ -76,6 +133,14 @@ class TelemetryAggregator(OTelBaseAgent):
             '1h': timedelta(hours=1),
             '24h': timedelta(hours=24)
         }
+        self.minute_values = defaultdict(list)
+        self.minute_sketches = {}
+        # Minutes stored before a restart stay closed: late points for them are dropped
+        self.rolled_up_through = {}
+        stored_through = self._stored_through('1m', '1m')
+        if stored_through is not None:
+            self.rolled_up_through['1m'] = stored_through
+        self.late_points = 0
         
         # Dashboard update thread
         self.dashboard_running = False
@@ -95,10 +160,19 @@ class TelemetryAggregator(OTelBaseAgent):
                 timestamp TIMESTAMP,
                 value REAL,
                 labels TEXT,
+                label_set_id INTEGER,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # Interned label sets (metric labels and span attributes)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS label_sets (
+                id INTEGER PRIMARY KEY,
+                labels TEXT UNIQUE
+            )
+        ''')
+        
         # Traces table
         conn.execute('''
             CREATE TABLE IF NOT EXISTS traces (
@@ -111,6 +185,7 @@ class TelemetryAggregator(OTelBaseAgent):
                 duration_ms REAL,
                 status TEXT,
                 attributes TEXT,
+                attribute_set_id INTEGER,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
@@ -131,10 +206,21 @@ class TelemetryAggregator(OTelBaseAgent):
                 p95 REAL,
                 p99 REAL,
                 labels TEXT,
+                label_set_id INTEGER,
+                sketch BLOB,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # Databases created before label interning and sketches lack these columns
+        for table, column, column_type in (('metrics', 'label_set_id', 'INTEGER'),
+                                           ('traces', 'attribute_set_id', 'INTEGER'),
+                                           ('aggregated_metrics', 'label_set_id', 'INTEGER'),
+                                           ('aggregated_metrics', 'sketch', 'BLOB')):
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+            if column not in columns:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+        
         # Alerts table
         conn.execute('''
             CREATE TABLE IF NOT EXISTS alerts (
@@ -190,49 +276,84 @@ class TelemetryAggregator(OTelBaseAgent):
             }
         ]
         
+    def label_set_id(self, labels: Optional[Dict]) -> int:
+        """Integer id of a label set, stored on first sight (call under ingest_lock)"""
+        try:
+            key = frozenset(labels.items()) if labels else frozenset()
+        except TypeError:
+            key = canonical_labels(labels)
+        label_id = self._label_keys.get(key)
+        if label_id is None:
+            text = canonical_labels(labels)
+            label_id = self.label_ids.get(text)
+            if label_id is None:
+                # SQLite assigns the id, so processes sharing the database agree on it
+                with self.conn:
+                    self.conn.execute('INSERT INTO label_sets (labels) VALUES (?) ON CONFLICT(labels) DO NOTHING',
+                                      (text,))
+                    label_id = self.conn.execute('SELECT id FROM label_sets WHERE labels = ?',
+                                                 (text,)).fetchone()[0]
+                self.label_texts[label_id] = text
+                self.label_ids[text] = label_id
+            self._label_keys[key] = label_id
+        return label_id
+        
+    def label_text(self, label_id: int) -> str:
+        """Canonical labels of an id, including ids another process assigned"""
+        text = self.label_texts.get(label_id)
+        if text is None:
+            row = self.conn.execute('SELECT labels FROM label_sets WHERE id = ?', (label_id,)).fetchone()
+            text = row[0] if row else ''
+        return text
+            
     @instrument_function()
     def ingest_metrics(self, metrics: List[Dict]):
-        """Ingest metrics from OTLP export"""
-        conn = sqlite3.connect(self.telemetry_db)
-        
-        for metric in metrics:
-            # Store in database
-            conn.execute('''
-                INSERT INTO metrics (metric_name, timestamp, value, labels)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                metric['name'],
-                metric['timestamp'],
-                metric['value'],
-                json.dumps(metric.get('labels', {}))
-            ))
+        """Ingest metrics from OTLP export in one transaction"""
+        with self.ingest_lock:
+            rows = [(metric['name'], metric['timestamp'], metric['value'], self.label_set_id(metric.get('labels')))
+                    for metric in metrics]
+            with self.conn:
+                self.conn.executemany('''
+                    INSERT INTO metrics (metric_name, timestamp, value, label_set_id)
+                    VALUES (?, ?, ?, ?)
+                ''', rows)
             
-            # Buffer for real-time analysis
-            point = MetricPoint(
-                timestamp=datetime.fromisoformat(metric['timestamp']),
-                value=metric['value'],
-                labels=metric.get('labels', {})
-            )
-            self.metric_buffers[metric['name']].append(point)
-            
-        conn.commit()
-        conn.close()
-        
-        # Check alerts
-        self.check_alerts()
+            # Buffer for real-time analysis; only the newest points per metric survive
+            positions = defaultdict(list)
+            for i, row in enumerate(rows):
+                positions[row[0]].append(i)
+            for name, indices in positions.items():
+                newest = [rows[i] for i in indices[-METRIC_BUFFER_SIZE:]]
+                self.metric_buffers[name].extend(
+                    timestamp=[datetime.fromisoformat(row[1]).timestamp() for row in newest],
+                    value=[row[2] for row in newest],
+                    label_set=[row[3] for row in newest]
+                )
+                
+            # Sketch the batch per minute; ISO timestamps share their minute prefix
+            flushed = self.rolled_up_through.get('1m')
+            flushed = flushed.isoformat()[:16] if flushed else ''
+            batch_values = defaultdict(list)
+            for name, timestamp, value, label_id in rows:
+                batch_values[(timestamp[:16], name, label_id)].append(value)
+            for key, values in batch_values.items():
+                if key[0] < flushed:
+                    self.late_points += len(values)
+                    continue
+                pending = self.minute_values[key]
+                pending.extend(values)
+                if len(pending) >= SKETCH_BATCH:
+                    self._fold(key, self.minute_values.pop(key))
+                
+        # Alerts run on an interval, not per batch
+        if time.time() - self.alerts_checked_at >= ALERT_CHECK_INTERVAL:
+            self.check_alerts()
         
     @instrument_function()
     def ingest_traces(self, traces: List[Dict]):
-        """Ingest trace data from OTLP export"""
-        conn = sqlite3.connect(self.telemetry_db)
-        
-        for trace in traces:
-            # Store in database
-            conn.execute('''
-                INSERT INTO traces 
-                (trace_id, span_id, span_name, start_time, end_time, duration_ms, status, attributes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+        """Ingest trace data from OTLP export in one transaction"""
+        with self.ingest_lock:
+            rows = [(
                 trace['trace_id'],
                 trace['span_id'],
                 trace['name'],
@@ -240,111 +361,158 @@ class TelemetryAggregator(OTelBaseAgent):
                 trace['end_time'],
                 trace['duration_ms'],
                 trace['status'],
-                json.dumps(trace.get('attributes', {}))
-            ))
+                self.label_set_id(trace.get('attributes'))
+            ) for trace in traces]
+            with self.conn:
+                self.conn.executemany('''
+                    INSERT INTO traces 
+                    (trace_id, span_id, span_name, start_time, end_time, duration_ms, status, attribute_set_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
             
             # Buffer for real-time analysis
-            span = TraceSpan(
-                trace_id=trace['trace_id'],
-                span_id=trace['span_id'],
-                name=trace['name'],
-                start_time=datetime.fromisoformat(trace['start_time']),
-                end_time=datetime.fromisoformat(trace['end_time']),
-                duration_ms=trace['duration_ms'],
-                status=trace['status'],
-                attributes=trace.get('attributes', {})
+            newest = rows[-TRACE_BUFFER_SIZE:]
+            for row in newest:
+                if row[2] not in self.span_name_ids:
+                    self.span_name_ids[row[2]] = len(self.span_names)
+                    self.span_names.append(row[2])
+            self.trace_buffer.extend(
+                start_time=[datetime.fromisoformat(row[3]).timestamp() for row in newest],
+                duration_ms=[row[5] for row in newest],
+                name=[self.span_name_ids[row[2]] for row in newest]
             )
-            self.trace_buffer.append(span)
             
-        conn.commit()
-        conn.close()
+    def _fold(self, key: Tuple[str, str, int], values: List[float]):
+        """Add buffered values to the sketch of an open minute"""
+        if key not in self.minute_sketches:
+            self.minute_sketches[key] = QuantileSketch()
+        self.minute_sketches[key].add(values)
+        
+    def period_start(self, moment: datetime, window: str) -> datetime:
+        """Start of the window period containing moment (periods align to midnight)"""
+        delta = self.aggregation_windows[window]
+        midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        return midnight + (moment - midnight) // delta * delta
         
     def aggregate_metrics(self, window: str):
-        """Aggregate metrics for a specific time window"""
+        """Store sketches for completed periods of a window
+        
+        1m periods come from the sketches built at ingest; every larger window
+        merges the stored sketches of the window below it, so no raw metric
+        rows are read.
+        """
         if window not in self.aggregation_windows:
             return
             
-        window_delta = self.aggregation_windows[window]
-        now = datetime.now()
-        window_start = now - window_delta
-        
+        if window == '1m':
+            cutoff = self.period_start(datetime.now() - LATE_POINT_GRACE, '1m')
+            with self.ingest_lock:
+                closed = cutoff.isoformat()[:16]
+                for key in [key for key in self.minute_values if key[0] < closed]:
+                    self._fold(key, self.minute_values.pop(key))
+                ready = [key for key in self.minute_sketches if key[0] < closed]
+                periods = {key: self.minute_sketches.pop(key) for key in ready}
+                self.rolled_up_through['1m'] = cutoff
+            self.store_sketches('1m', {(datetime.fromisoformat(minute), name, label_id): sketch
+                                       for (minute, name, label_id), sketch in periods.items()})
+            return
+            
+        source = ROLLUP_SOURCES[window]
+        source_through = self.rolled_up_through.get(source)
+        if source_through is None:
+            return
+        end = self.period_start(source_through, window)
+        start = self.rolled_up_through.get(window) or self._stored_through(window, source)
+        if start is None or start >= end:
+            return
+            
         conn = sqlite3.connect(self.telemetry_db)
-        
-        # Get metrics for aggregation
         cursor = conn.execute('''
-            SELECT metric_name, value, labels
-            FROM metrics
-            WHERE timestamp >= ?
-        ''', (window_start.isoformat(),))
+            SELECT metric_name, label_set_id, timestamp, sketch
+            FROM aggregated_metrics
+            WHERE window = ? AND timestamp >= ? AND timestamp < ? AND sketch IS NOT NULL
+        ''', (source, start.isoformat(), end.isoformat()))
+        
+        # Merge the smaller window's sketches into this window's periods
+        periods = {}
+        for metric_name, label_id, timestamp, blob in cursor:
+            key = (self.period_start(datetime.fromisoformat(timestamp), window), metric_name, label_id)
+            sketch = QuantileSketch.from_bytes(blob)
+            if key in periods:
+                periods[key].merge(sketch)
+            else:
+                periods[key] = sketch
+        conn.close()
         
-        # Group by metric name and labels
-        metric_groups = defaultdict(list)
-        for row in cursor:
-            metric_name, value, labels_json = row
-            key = (metric_name, labels_json)
-            metric_groups[key].append(value)
-        
-        # Calculate aggregations
-        for (metric_name, labels_json), values in metric_groups.items():
-            if not values:
-                continue
-                
-            sorted_values = sorted(values)
-            
-            aggregation = {
-                'count': len(values),
-                'sum': sum(values),
-                'min': min(values),
-                'max': max(values),
-                'avg': statistics.mean(values),
-                'p50': sorted_values[len(values)//2],
-                'p95': sorted_values[int(len(values)*0.95)],
-                'p99': sorted_values[int(len(values)*0.99)]
-            }
-            
-            # Store aggregation
-            conn.execute('''
-                INSERT INTO aggregated_metrics
-                (metric_name, window, timestamp, count, sum, min, max, avg, p50, p95, p99, labels)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+        self.store_sketches(window, periods)
+        self.rolled_up_through[window] = end
+        
+    def _stored_through(self, window: str, source: str) -> Optional[datetime]:
+        """Where a window's rollup resumes: after its newest stored period, else at its oldest input"""
+        conn = sqlite3.connect(self.telemetry_db)
+        latest = conn.execute('''
+            SELECT MAX(timestamp) FROM aggregated_metrics WHERE window = ? AND sketch IS NOT NULL
+        ''', (window,)).fetchone()[0]
+        earliest = conn.execute('''
+            SELECT MIN(timestamp) FROM aggregated_metrics WHERE window = ? AND sketch IS NOT NULL
+        ''', (source,)).fetchone()[0]
+        conn.close()
+        
+        if latest:
+            return self.period_start(datetime.fromisoformat(latest), window) + self.aggregation_windows[window]
+        if earliest:
+            return self.period_start(datetime.fromisoformat(earliest), window)
+        return None
+        
+    def store_sketches(self, window: str, periods: Dict[Tuple[datetime, str, int], QuantileSketch]):
+        """Write one aggregated_metrics row (summary plus sketch) per period and series"""
+        rows = []
+        for (period, metric_name, label_id), sketch in periods.items():
+            p50, p95, p99 = sketch.quantiles(0.5, 0.95, 0.99)
+            rows.append((
                 metric_name,
                 window,
-                now.isoformat(),
-                aggregation['count'],
-                aggregation['sum'],
-                aggregation['min'],
-                aggregation['max'],
-                aggregation['avg'],
-                aggregation['p50'],
-                aggregation['p95'],
-                aggregation['p99'],
-                labels_json
+                period.isoformat(),
+                sketch.count,
+                sketch.sum,
+                sketch.min,
+                sketch.max,
+                sketch.mean,
+                p50,
+                p95,
+                p99,
+                self.label_text(label_id),
+                label_id,
+                sketch.to_bytes()
             ))
             
-        conn.commit()
-        conn.close()
-        
+        with self.ingest_lock, self.conn:
+            self.conn.executemany('''
+                INSERT INTO aggregated_metrics
+                (metric_name, window, timestamp, count, sum, min, max, avg, p50, p95, p99, labels, label_set_id, sketch)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            
     def check_alerts(self):
         """Check alert conditions and trigger if necessary"""
-        now = datetime.now()
+        now = time.time()
+        self.alerts_checked_at = now
         
         for condition in self.alert_conditions:
             metric_name = condition['metric']
             
             # Get recent metric values
             if metric_name in self.metric_buffers:
-                recent_points = list(self.metric_buffers[metric_name])
+                buffer = self.metric_buffers[metric_name]
+                timestamps = buffer.column('timestamp')
                 
                 # Simple condition evaluation (would be more sophisticated in practice)
                 if 'rate_5m' in condition['condition']:
                     # Calculate 5-minute rate
-                    five_min_ago = now - timedelta(minutes=5)
-                    recent_values = [p.value for p in recent_points 
-                                   if p.timestamp >= five_min_ago]
+                    recent_values = buffer.column('value')[timestamps >= now - 5 * 60]
                     
-                    if recent_values:
-                        rate = sum(recent_values) / (5 * 60)  # per second
+                    if len(recent_values):
+                        rate = float(recent_values.sum()) / (5 * 60)  # per second
                         threshold = float(condition['condition'].split('>')[-1])
                         
                         if rate > threshold:
@@ -355,9 +523,7 @@ class TelemetryAggregator(OTelBaseAgent):
                             
                 elif 'count_1h' in condition['condition']:
                     # Count in last hour
-                    one_hour_ago = now - timedelta(hours=1)
-                    count = sum(1 for p in recent_points 
-                               if p.timestamp >= one_hour_ago)
+                    count = int(np.count_nonzero(timestamps >= now - 60 * 60))
                     
                     threshold = int(condition['condition'].split('<')[-1])
                     
@@ -421,29 +587,30 @@ class TelemetryAggregator(OTelBaseAgent):
         }
         
         # Get recent metrics
-        for metric_name, buffer in self.metric_buffers.items():
-            recent = list(buffer)[-100:]  # Last 100 points
-            if recent:
+        for metric_name, buffer in list(self.metric_buffers.items()):
+            values = buffer.column('value', last=100)  # Last 100 points
+            if len(values):
                 data['metrics'][metric_name] = {
-                    'timestamps': [p.timestamp.isoformat() for p in recent],
-                    'values': [p.value for p in recent],
-                    'current': recent[-1].value,
-                    'avg_1m': statistics.mean([p.value for p in recent[-10:]]) if len(recent) >= 10 else recent[-1].value
+                    'timestamps': [datetime.fromtimestamp(t).isoformat()
+                                   for t in buffer.column('timestamp', last=100).tolist()],
+                    'values': values.tolist(),
+                    'current': float(values[-1]),
+                    'avg_1m': float(values[-10:].mean()) if len(values) >= 10 else float(values[-1])
                 }
         
         # Get trace statistics
-        recent_traces = list(self.trace_buffer)
-        if recent_traces:
+        if len(self.trace_buffer):
             # Group by span name
-            span_stats = defaultdict(list)
-            for span in recent_traces:
-                span_stats[span.name].append(span.duration_ms)
+            names = self.trace_buffer.column('name')
+            durations = self.trace_buffer.column('duration_ms')
+            span_stats = {self.span_names[name_id]: np.sort(durations[names == name_id])
+                          for name_id in np.unique(names).tolist()}
                 
             data['traces'] = {
                 name: {
                     'count': len(durations),
-                    'avg_duration': statistics.mean(durations),
-                    'p95_duration': sorted(durations)[int(len(durations)*0.95)] if durations else 0
+                    'avg_duration': float(durations.mean()),
+                    'p95_duration': float(durations[int(len(durations)*0.95)])
                 }
                 for name, durations in span_stats.items()
             }
@@ -607,6 +774,8 @@ class TelemetryAggregator(OTelBaseAgent):
                     for window in self.aggregation_windows:
                         self.aggregate_metrics(window)
                         
+                    self.check_alerts()
+                        
                     # Clean old data
                     self.cleanup_old_data()
                     
@@ -647,7 +816,42 @@ class TelemetryAggregator(OTelBaseAgent):
         conn.commit()
         conn.close()
 
+def benchmark_ingest(points: int = 1_000_000, batch_size: int = 1000):
+    """Metric ingest throughput, then one aggregation cycle, on a scratch database"""
+    import random
+    import tempfile
+    
+    rng = random.Random(1)
+    names = [f"cdcs.bench.metric_{i}" for i in range(10)] + ['cdcs.agent.errors']
+    label_sets = [{'agent': f"Agent{i}", 'host': 'local'} for i in range(20)]
+    start = datetime.now() - timedelta(seconds=points / 1000)
+    batches = [[{
+        'name': rng.choice(names),
+        'timestamp': (start + timedelta(milliseconds=b * batch_size + i)).isoformat(),
+        'value': rng.random(),
+        'labels': dict(rng.choice(label_sets))
+    } for i in range(batch_size)] for b in range(points // batch_size)]
+    
+    with tempfile.TemporaryDirectory() as scratch:
+        aggregator = TelemetryAggregator(None, telemetry_db=Path(scratch) / "bench.db")
+        began = time.perf_counter()
+        for batch in batches:
+            aggregator.ingest_metrics(batch)
+        elapsed = time.perf_counter() - began
+        began = time.perf_counter()
+        for window in aggregator.aggregation_windows:
+            aggregator.aggregate_metrics(window)
+        aggregated = time.perf_counter() - began
+        aggregator.conn.close()
+    print(f"=== Metric Ingest Benchmark ({points} points, batches of {batch_size}) ===")
+    print(f"{elapsed:.1f}s  {points / elapsed:,.0f} points/s")
+    print(f"aggregation cycle (all windows) {aggregated:.3f}s")
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark_ingest()
+        sys.exit(0)
+        
     # Test telemetry aggregator
     from cdcs_orchestrator import CDCSOrchestrator
     
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+TF-IDF Store - Persistent vocabulary, document frequencies and sparse session vectors
+New sessions update the model incrementally; similarity is a sparse top-k
+query over an inverted index instead of an all-pairs dense matrix
+"""
+
+import re
+import time
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+TOKEN = re.compile(r'[a-z][a-z0-9_]{2,}')
+
+STOP_WORDS = frozenset("""
+about above after again against all also and any are because been before being below
+between both but can could did does doing down during each few for from further had
+has have having her here hers herself him himself his how into its itself just more
+most myself nor not now off once only other our ours ourselves out over own same she
+should some such than that the their theirs them themselves then there these they
+this those through too under until very was were what when where which while who
+whom why will with would you your yours yourself yourselves
+""".split())
+
+# Query terms scored against the inverted index (highest tf-idf first);
+# low-idf terms add little and touch the longest posting lists
+QUERY_TERMS = 32
+# Candidates re-scored with exact cosine per requested neighbour
+RERANK_FACTOR = 4
+
+
+def term_counts(text: str) -> Counter:
+    """Token counts with stop words removed"""
+    return Counter(t for t in TOKEN.findall(text.lower()) if t not in STOP_WORDS)
+
+
+class TfidfStore:
+    """SQLite-backed incremental TF-IDF model with an inverted index"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS terms (
+                    id INTEGER PRIMARY KEY,
+                    term TEXT UNIQUE,
+                    df INTEGER
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT UNIQUE,
+                    sha256 TEXT,
+                    term_ids BLOB,
+                    counts BLOB,
+                    norm REAL,
+                    updated_at REAL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    term_id INTEGER,
+                    doc_id INTEGER,
+                    count INTEGER,
+                    PRIMARY KEY (term_id, doc_id)
+                ) WITHOUT ROWID
+            """)
+
+        # Vocabulary and document frequencies stay in memory for weighting
+        self.vocabulary = dict(self._conn.execute("SELECT term, id FROM terms"))
+        self.df = np.zeros(max(self.vocabulary.values(), default=0) + 1, dtype=np.int64)
+        for term_id, df in self._conn.execute("SELECT id, df FROM terms"):
+            self.df[term_id] = df
+        self.documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def idf(self, term_ids: np.ndarray) -> np.ndarray:
+        """Smoothed inverse document frequency (as in sklearn's TfidfVectorizer)"""
+        return np.log((1 + self.documents) / (1 + self.df[term_ids])) + 1
+
+    def weights(self, term_ids: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Sublinear tf times idf"""
+        return (1 + np.log(counts)) * self.idf(term_ids)
+
+    def _term_ids(self, terms: List[str]) -> np.ndarray:
+        new_terms = [t for t in terms if t not in self.vocabulary]
+        if new_terms:
+            start = len(self.df)
+            self._conn.executemany("INSERT INTO terms (id, term, df) VALUES (?, ?, 0)",
+                                   [(start + i, t) for i, t in enumerate(new_terms)])
+            self.vocabulary.update((t, start + i) for i, t in enumerate(new_terms))
+            self.df = np.concatenate([self.df, np.zeros(len(new_terms), dtype=np.int64)])
+        return np.fromiter((self.vocabulary[t] for t in terms), dtype=np.int64, count=len(terms))
+
+    def add_document(self, key: str, sha256: str, text: str) -> bool:
+        """Index or re-index one document; False when it is already current"""
+        with self._lock, self._conn:
+            return self._add_document(key, sha256, text)
+
+    def update(self, sessions: List[Dict]) -> int:
+        """Index sessions that are new or changed in one transaction; returns how many"""
+        with self._lock:
+            current = dict(self._conn.execute("SELECT key, sha256 FROM documents"))
+        # Checked before touching 'content', which may still be on disk
+        changed = [s for s in sessions
+                   if s.get('sha256') is None or current.get(s['file']) != s['sha256']]
+
+        added = 0
+        with self._lock, self._conn:
+            for session in changed:
+                added += self._add_document(session['file'], session.get('sha256'), session['content'])
+        return added
+
+    def _add_document(self, key: str, sha256: Optional[str], text: str) -> bool:
+        conn = self._conn
+        previous = conn.execute(
+            "SELECT id, sha256, term_ids FROM documents WHERE key = ?", (key,)
+        ).fetchone()
+        if previous and sha256 is not None and previous[1] == sha256:
+            return False
+
+        if previous:
+            # Changed session: retract its old terms before adding new ones
+            doc_id, _, old_blob = previous
+            old_ids = np.frombuffer(old_blob, dtype=np.uint32).astype(np.int64)
+            self.df[old_ids] -= 1
+            conn.executemany("UPDATE terms SET df = df - 1 WHERE id = ?", [(int(i),) for i in old_ids])
+            conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        else:
+            doc_id = conn.execute("INSERT INTO documents (key) VALUES (?)", (key,)).lastrowid
+            self.documents += 1
+
+        counts = term_counts(text)
+        terms = sorted(counts)
+        term_ids = self._term_ids(terms)
+        term_counts_array = np.array([counts[t] for t in terms], dtype=np.int64)
+        self.df[term_ids] += 1
+        conn.executemany("UPDATE terms SET df = df + 1 WHERE id = ?", [(int(i),) for i in term_ids])
+        conn.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                         [(int(t), doc_id, int(c)) for t, c in zip(term_ids, term_counts_array)])
+
+        norm = float(np.linalg.norm(self.weights(term_ids, term_counts_array))) if len(terms) else 0.0
+        conn.execute(
+            "UPDATE documents SET sha256 = ?, term_ids = ?, counts = ?, norm = ?, updated_at = ? WHERE id = ?",
+            (sha256, term_ids.astype(np.uint32).tobytes(), term_counts_array.astype(np.uint32).tobytes(),
+             norm, time.time(), doc_id)
+        )
+        return True
+
+    def _vector(self, key: str) -> Optional[Tuple[int, np.ndarray, np.ndarray]]:
+        row = self._conn.execute("SELECT id, term_ids, counts FROM documents WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        doc_id, term_blob, count_blob = row
+        term_ids = np.frombuffer(term_blob or b'', dtype=np.uint32).astype(np.int64)
+        counts = np.frombuffer(count_blob or b'', dtype=np.uint32).astype(np.float64)
+        return doc_id, term_ids, counts
+
+    def similar(self, key: str, k: int = 4) -> List[Tuple[str, float]]:
+        """(key, cosine) of the k documents most similar to an indexed one"""
+        with self._lock:
+            vector = self._vector(key)
+            if vector is None or not len(vector[1]):
+                return []
+            doc_id, term_ids, counts = vector
+            query = self.weights(term_ids, counts)
+            query /= np.linalg.norm(query)
+
+            # Accumulate partial dot products from the strongest query terms
+            strongest = np.argsort(-query)[:QUERY_TERMS]
+            placeholders = ','.join('?' * len(strongest))
+            postings = self._conn.execute(
+                f"SELECT term_id, doc_id, count FROM postings WHERE term_id IN ({placeholders}) AND doc_id != ?",
+                [int(term_ids[i]) for i in strongest] + [doc_id]
+            ).fetchall()
+            if not postings:
+                return []
+
+            posting_array = np.array(postings, dtype=np.float64)
+            posting_terms = posting_array[:, 0].astype(np.int64)
+            posting_docs = posting_array[:, 1].astype(np.int64)
+            query_weight = dict(zip(term_ids[strongest].tolist(), query[strongest].tolist()))
+            contributions = (np.array([query_weight[t] for t in posting_terms.tolist()]) *
+                             self.weights(posting_terms, posting_array[:, 2]))
+            candidates, inverse = np.unique(posting_docs, return_inverse=True)
+            partial = np.bincount(inverse, weights=contributions)
+
+            # Rank by partial score over stored norms, then re-score exactly
+            norms = dict(self._conn.execute(
+                f"SELECT id, norm FROM documents WHERE id IN ({','.join('?' * len(candidates))})",
+                candidates.tolist()
+            ))
+            approximate = partial / np.array([norms[d] or 1.0 for d in candidates.tolist()])
+            shortlist = candidates[np.argsort(-approximate)[:k * RERANK_FACTOR]]
+
+            scored = []
+            for other_key, term_blob, count_blob in self._conn.execute(
+                    f"SELECT key, term_ids, counts FROM documents WHERE id IN ({','.join('?' * len(shortlist))})",
+                    shortlist.tolist()):
+                other_ids = np.frombuffer(term_blob, dtype=np.uint32).astype(np.int64)
+                other = self.weights(other_ids, np.frombuffer(count_blob, dtype=np.uint32).astype(np.float64))
+                norm = np.linalg.norm(other)
+                _, query_at, other_at = np.intersect1d(term_ids, other_ids, return_indices=True)
+                dot = float(query[query_at] @ other[other_at])
+                scored.append((other_key, float(dot / norm) if norm else 0.0))
+
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:k]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            postings = self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+        return {'documents': self.documents, 'terms': len(self.vocabulary), 'postings': postings}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Transition Model - Variable-order Markov model over topic and pattern sequences
+Transition counts live in compact integer arrays (one edge per observed
+context -> next state) and every context keeps its top-k successors up to
+date as counts grow, so next-state queries read a fixed-size row
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_ORDER = 2
+# Successors tracked per context; queries return at most this many
+TOP_K = 8
+# Score multiplier applied at each step down to a shorter context
+BACKOFF_WEIGHT = 0.4
+INITIAL_CAPACITY = 256
+
+
+def _grown(array: np.ndarray, needed: int, fill=0) -> np.ndarray:
+    """array resized to at least needed rows (doubling), new rows set to fill"""
+    capacity = len(array)
+    if needed <= capacity:
+        return array
+    capacity = max(capacity, 1)
+    while capacity < needed:
+        capacity *= 2
+    grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class TransitionModel:
+    """n-gram transition counts with per-context top-k and stupid backoff
+
+    Files in the model directory: counts.npz (edge context, next state and
+    count arrays, per-context totals and top-k edge rows) and states.json
+    (state names, context tuples and caller metadata such as watermarks).
+    """
+
+    def __init__(self, directory: Path, order: int = DEFAULT_ORDER, top_k: int = TOP_K):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.order = order
+        self.top_k = top_k
+        self.states: List[str] = []
+        self.contexts: List[Tuple[int, ...]] = []
+        self.meta: Dict = {}
+
+        self.edge_context = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self.edge_next = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self.edge_count = np.zeros(INITIAL_CAPACITY, dtype=np.uint32)
+        self.num_edges = 0
+        self.totals = np.zeros(INITIAL_CAPACITY, dtype=np.uint32)
+        self.best = np.full((INITIAL_CAPACITY, top_k), -1, dtype=np.int32)
+
+        states_path = self.directory / "states.json"
+        counts_path = self.directory / "counts.npz"
+        if states_path.exists() and counts_path.exists():
+            saved = json.loads(states_path.read_text())
+            self.states = saved['states']
+            self.contexts = [tuple(c) for c in saved['contexts']]
+            self.meta = saved.get('meta', {})
+            with np.load(counts_path) as arrays:
+                self.num_edges = len(arrays['edge_count'])
+                self.edge_context = _grown(arrays['edge_context'], INITIAL_CAPACITY)
+                self.edge_next = _grown(arrays['edge_next'], INITIAL_CAPACITY)
+                self.edge_count = _grown(arrays['edge_count'], INITIAL_CAPACITY)
+                self.totals = _grown(arrays['totals'], INITIAL_CAPACITY)
+                self.best = _grown(arrays['best'], INITIAL_CAPACITY, fill=-1)
+
+        self.state_ids = {state: i for i, state in enumerate(self.states)}
+        self.context_ids = {context: i for i, context in enumerate(self.contexts)}
+        self.edges = {(int(c), int(n)): e for e, (c, n) in enumerate(
+            zip(self.edge_context[:self.num_edges], self.edge_next[:self.num_edges]))}
+
+    def __len__(self) -> int:
+        return self.num_edges
+
+    def _state_id(self, state: str) -> int:
+        if state not in self.state_ids:
+            self.state_ids[state] = len(self.states)
+            self.states.append(state)
+        return self.state_ids[state]
+
+    def _context_id(self, context: Tuple[int, ...]) -> int:
+        if context not in self.context_ids:
+            self.context_ids[context] = len(self.contexts)
+            self.contexts.append(context)
+            self.totals = _grown(self.totals, len(self.contexts))
+            self.best = _grown(self.best, len(self.contexts), fill=-1)
+        return self.context_ids[context]
+
+    def _increment(self, context: Tuple[int, ...], next_id: int, count: int):
+        context_id = self._context_id(context)
+        edge = self.edges.get((context_id, next_id))
+        if edge is None:
+            edge = self.num_edges
+            self.num_edges += 1
+            self.edge_context = _grown(self.edge_context, self.num_edges)
+            self.edge_next = _grown(self.edge_next, self.num_edges)
+            self.edge_count = _grown(self.edge_count, self.num_edges)
+            self.edge_context[edge], self.edge_next[edge] = context_id, next_id
+            self.edges[(context_id, next_id)] = edge
+        self.edge_count[edge] += count
+        self.totals[context_id] += count
+
+        # Only this edge's count changed, so it is the only possible entrant
+        row = self.best[context_id]
+        if edge in row:
+            return
+        empty = np.flatnonzero(row < 0)
+        if len(empty):
+            row[empty[0]] = edge
+        else:
+            weakest = int(np.argmin(self.edge_count[row]))
+            if self.edge_count[edge] > self.edge_count[row[weakest]]:
+                row[weakest] = edge
+
+    def add(self, context: Sequence[str], next_state: str, count: int = 1):
+        """Count one transition under its full context and every shorter suffix"""
+        ids = tuple(self._state_id(s) for s in context)[-self.order:] if self.order else ()
+        next_id = self._state_id(next_state)
+        for n in range(len(ids) + 1):
+            self._increment(ids[len(ids) - n:], next_id, count)
+
+    def update(self, sequence: Iterable[str], context: Sequence[str] = ()) -> int:
+        """Count the transitions of a finished sequence; context is what preceded it"""
+        history = list(context)[-self.order:] if self.order else []
+        added = 0
+        for state in sequence:
+            self.add(history, state)
+            history = (history + [state])[-self.order:] if self.order else []
+            added += 1
+        return added
+
+    def successors(self, context: Sequence[str], k: int = TOP_K) -> List[Tuple[str, int, float]]:
+        """(next state, count, probability) seen after exactly this context, best first"""
+        try:
+            ids = tuple(self.state_ids[s] for s in context)
+        except KeyError:
+            return []
+        context_id = self.context_ids.get(ids)
+        if context_id is None:
+            return []
+        row = self.best[context_id]
+        row = row[row >= 0]
+        row = row[np.argsort(-self.edge_count[row].astype(np.int64), kind='stable')][:k]
+        total = float(self.totals[context_id])
+        return [(self.states[self.edge_next[e]], int(self.edge_count[e]), float(self.edge_count[e] / total))
+                for e in row]
+
+    def predict(self, history: Sequence[str], k: int = 5, backoff: bool = True) -> List[Tuple[str, float]]:
+        """(next state, score) after history, backing off to shorter contexts to fill k"""
+        history = list(history)[-self.order:] if self.order else []
+        scores = {}
+        weight = 1.0
+        for n in range(len(history), -1, -1):
+            found = self.successors(history[len(history) - n:], k)
+            for state, _, probability in found:
+                scores.setdefault(state, weight * probability)
+            if len(scores) >= k or (found and not backoff):
+                break
+            weight *= BACKOFF_WEIGHT
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def iter_contexts(self, order: int) -> Iterable[Tuple[str, ...]]:
+        """Every observed context of the given length"""
+        for context in self.contexts:
+            if len(context) == order:
+                yield tuple(self.states[i] for i in context)
+
+    def save(self):
+        """Write counts and states; a model with no transitions is not written"""
+        if not self.num_edges:
+            return
+        tmp_path = self.directory / "counts.tmp.npz"
+        n, c = self.num_edges, len(self.contexts)
+        np.savez(tmp_path, edge_context=self.edge_context[:n], edge_next=self.edge_next[:n],
+                 edge_count=self.edge_count[:n], totals=self.totals[:c], best=self.best[:c])
+        os.replace(tmp_path, self.directory / "counts.npz")
+        tmp_path = self.directory / "states.tmp"
+        tmp_path.write_text(json.dumps({'states': self.states,
+                                        'contexts': [list(c) for c in self.contexts],
+                                        'meta': self.meta}))
+        os.replace(tmp_path, self.directory / "states.json")
+
+    def stats(self) -> Dict[str, int]:
+        return {'states': len(self.states), 'contexts': len(self.contexts),
+                'transitions': int(self.totals[self.context_ids[()]]) if () in self.context_ids else 0,
+                'edges': self.num_edges}
+
+
+if __name__ == "__main__":
+    # Round-trip check: empty and populated models survive save and reload
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as scratch:
+        empty = TransitionModel(Path(scratch) / "empty")
+        empty.save()
+        assert TransitionModel(Path(scratch) / "empty").stats()['edges'] == 0
+
+        model = TransitionModel(Path(scratch) / "model")
+        model.update(['plan', 'code', 'test', 'code', 'test', 'ship'])
+        model.save()
+        reloaded = TransitionModel(Path(scratch) / "model")
+        assert reloaded.stats() == model.stats()
+        assert reloaded.predict(['code']) == model.predict(['code'])
+        reloaded.add(['test'], 'ship')
+        print(f"round trip ok: {reloaded.stats()}")
@@ -13,6 +13,12 @@ import json
 import subprocess
 import os
 
+try:
+    from automation.preload_cache import PreloadCache
+    HAS_PRELOAD_CACHE = True
+except ImportError:
+    HAS_PRELOAD_CACHE = False
+
 
 @dataclass
 class RecoveryConfig:
@@ -23,6 +29,7 @@ class RecoveryConfig:
     use_ai_enhancement: bool = False
     cache_results: bool = True
     workspace_paths: List[Path] = None
+    preload_cache_path: Path = Path("/Users/sac/claude-desktop-context/cache/preload.cache")
     
     def __post_init__(self):
         if self.workspace_paths is None:
@@ -370,6 +377,9 @@ class DualModeSessionRecovery:
         # Add recommendations based on recovery
         session_data['recommendations'] = self._generate_recommendations(session_data)
         
+        # Predicted context for the recovered session
+        session_data['preloaded'] = self._preloaded_context()
+        
         # Cache if configured
         if self.config.cache_results:
             self._cache_session(session_data)
@@ -397,6 +407,17 @@ class DualModeSessionRecovery:
         
         return recommendations
     
+    def _preloaded_context(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Top predictions from the preload cache, read through its mmap'd index."""
+        if not HAS_PRELOAD_CACHE:
+            return []
+        
+        cache = PreloadCache(self.config.preload_cache_path)
+        try:
+            return [{'name': name, 'score': round(score, 3)} for name, score in cache.top(limit)]
+        finally:
+            cache.close()
+    
     def _cache_session(self, session_data: Dict[str, Any]) -> None:
         """Cache recovered session data."""
         cache_path = Path("/Users/sac/claude-desktop-context/.recovery_cache.json")
@@ -455,6 +476,9 @@ def recover_cdcs_session(mode: Optional[str] = None) -> Dict[str, Any]:
     if result.get('projects'):
         print(f"- Projects Found: {len(result['projects'])}")
     
+    if result.get('preloaded'):
+        print(f"- Preloaded: {', '.join(entry['name'] for entry in result['preloaded'])}")
+    
     if result.get('recommendations'):
         print("\n💡 Recommendations:")
         for rec in result['recommendations']:
@@ -6,15 +6,21 @@ Provides efficient command shortcuts leveraging SPR architecture
 
 import os
 import re
+import sys
 import json
 import subprocess
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation.preload_cache import PreloadCache
+
 class ClaudeCommands:
     def __init__(self, base_path="/Users/sac/claude-desktop-context"):
         self.base_path = Path(base_path)
         self.spr_path = self.base_path / "spr_kernels"
+        self.preload_cache = PreloadCache(self.base_path / "cache/preload.cache")
         self.commands = self._register_commands()
         
     def _register_commands(self):
@@ -98,6 +104,12 @@ class ClaudeCommands:
         if current.exists():
             output.append(f"📂 Active session: {current.read_text()[:100]}...")
             
+        # Patterns the predictive loader expects next, straight from the cache index
+        preloaded = self.preload_cache.top(3, prefix="pattern:")
+        if preloaded:
+            output.append("⚡ Preloaded patterns: " + ', '.join(
+                name.split(':', 1)[1] for name, _ in preloaded))
+            
         return '\n'.join(output)
     
     def spr_status(self, *args):
@@ -293,7 +305,18 @@ class ClaudeCommands:
         return "📈 Efficiency metrics..."
     
     def show_predictions(self, *args):
-        return "🔮 Predictive suggestions..."
+        """Show preloaded predictions, or one entry's content by name"""
+        if args:
+            content = self.preload_cache.get_text(args[0])
+            return content if content is not None else f"'{args[0]}' is not preloaded"
+            
+        entries = self.preload_cache.top(10)
+        if not entries:
+            return "🔮 No predictions preloaded yet"
+        output = ["🔮 Preloaded predictions:"]
+        for name, score in entries:
+            output.append(f"  • {name} ({score:.2f})")
+        return '\n'.join(output)
     
     def run_tests(self, *args):
         component = args[0] if args else "all"
@@ -6,11 +6,19 @@ Version: 2.2.0
 
 import json
 import os
+import sys
 import math
-from collections import Counter, defaultdict
+from collections import defaultdict
 from datetime import datetime, timedelta
 import hashlib
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation.text_stats import shannon_entropy
+from automation.ann_index import IVFIndex
+from automation.pattern_catalog import shared_catalog
+from automation.transition_model import TransitionModel
+
 class PredictiveLoader:
     def __init__(self, cdcs_root="/Users/sac/claude-desktop-context"):
         self.root = cdcs_root
@@ -18,8 +26,15 @@ class PredictiveLoader:
         self.cache_file = os.path.join(self.prediction_dir, "context_cache.json")
         self.history_file = os.path.join(self.prediction_dir, "interaction_history.json")
         self.patterns_dir = os.path.join(self.root, "patterns/catalog")
+        self.catalog = shared_catalog(self.patterns_dir)
         
         self.load_history()
+        self.vectors = IVFIndex(os.path.join(self.root, "memory/index/conversations"), dim=384)
+        self.migrate_history_vectors()
+        transitions_dir = os.path.join(self.prediction_dir, "transitions")
+        self.topic_transitions = TransitionModel(os.path.join(transitions_dir, "topics"))
+        self.pattern_transitions = TransitionModel(os.path.join(transitions_dir, "patterns"))
+        self.migrate_history_transitions()
         
     def load_history(self):
         """Load interaction history for pattern analysis"""
@@ -29,27 +44,49 @@ class PredictiveLoader:
         else:
             self.history = {
                 "sessions": [],
-                "patterns": defaultdict(int),
-                "transitions": defaultdict(lambda: defaultdict(int))
+                "patterns": defaultdict(int)
             }
     
+    def migrate_history_vectors(self):
+        """Move vectors still stored inline in the history JSON into the matrix"""
+        legacy = [s for s in self.history.get("sessions", []) if "vector" in s]
+        if not legacy:
+            return
+        # Sessions saved without a vector were never matched, so they get no row
+        vectorized = [s for s in legacy if s["vector"]]
+        rows = self.vectors.extend(s["vector"] for s in vectorized) if vectorized else []
+        for session, row in zip(vectorized, rows):
+            session["row"] = row
+        for session in legacy:
+            del session["vector"]
+        self.save_history()
+    
+    def migrate_history_transitions(self):
+        """Move topic transition counts kept in the history JSON into the model"""
+        legacy = self.history.pop("transitions", None)
+        if legacy is None:
+            return
+        for topic, next_topics in legacy.items():
+            for next_topic, count in next_topics.items():
+                self.topic_transitions.add([topic], next_topic, count)
+        self.topic_transitions.save()
+        self.save_history()
+    
+    def last_session(self):
+        sessions = self.history.get("sessions", [])
+        return sessions[-1] if sessions else {}
+    
+    def predict_from_transitions(self, num_predictions=3):
+        """Model-free next topics and patterns from the last session's sequences"""
+        last = self.last_session()
+        return {
+            "topics": self.topic_transitions.predict(last.get("topics", []), num_predictions),
+            "patterns": self.pattern_transitions.predict(last.get("patterns", []), num_predictions)
+        }
+    
     def calculate_shannon_entropy(self, text):
         """Calculate Shannon entropy of text"""
-        if not text:
-            return 0.0
-            
-        # Count character frequencies
-        freq = Counter(text)
-        total = len(text)
-        
-        # Calculate entropy
-        entropy = 0
-        for count in freq.values():
-            p = count / total
-            if p > 0:
-                entropy -= p * math.log2(p)
-                
-        return entropy
+        return shannon_entropy(text)
     
     def extract_conversation_vector(self, messages, vector_size=384):
         """Extract a simple vector representation of conversation"""
@@ -92,32 +129,33 @@ class PredictiveLoader:
         # Extract current vector
         current_vector = self.extract_conversation_vector(current_context)
         
-        # Compare with historical patterns
-        similarities = []
-        for session in self.history.get("sessions", []):
-            hist_vector = session.get("vector", [])
-            if hist_vector:
-                sim = self.cosine_similarity(current_vector, hist_vector)
-                similarities.append({
-                    "similarity": sim,
-                    "next_topics": session.get("topics", []),
-                    "patterns_used": session.get("patterns", [])
-                })
-        
-        # Sort by similarity
-        similarities.sort(key=lambda x: x["similarity"], reverse=True)
+        # Approximate nearest neighbours over every historical session
+        sessions = {s["row"]: s for s in self.history.get("sessions", []) if "row" in s}
+        rows, scores = self.vectors.top_k(current_vector, 10)  # Top 10 most similar
+        similarities = [{
+            "similarity": float(score),
+            "next_topics": sessions[row].get("topics", []),
+            "patterns_used": sessions[row].get("patterns", [])
+        } for row, score in zip(rows.tolist(), scores) if row in sessions]
         
         # Aggregate predictions
         topic_scores = defaultdict(float)
         pattern_scores = defaultdict(float)
         
-        for sim in similarities[:10]:  # Top 10 most similar
+        for sim in similarities:
             weight = sim["similarity"]
             for topic in sim["next_topics"]:
                 topic_scores[topic] += weight
             for pattern in sim["patterns_used"]:
                 pattern_scores[pattern] += weight
         
+        # Blend in transition-count predictions from where the last session left off
+        transitions = self.predict_from_transitions(num_predictions)
+        for topic, score in transitions["topics"]:
+            topic_scores[topic] += score
+        for pattern, score in transitions["patterns"]:
+            pattern_scores[pattern] += score
+        
         # Generate predictions
         top_topics = sorted(topic_scores.items(), key=lambda x: x[1], reverse=True)
         top_patterns = sorted(pattern_scores.items(), key=lambda x: x[1], reverse=True)
@@ -163,29 +201,35 @@ class PredictiveLoader:
     
     def find_pattern_file(self, pattern_name):
         """Find pattern file by name"""
-        for root, dirs, files in os.walk(self.patterns_dir):
-            for file in files:
-                if pattern_name.lower() in file.lower():
-                    return os.path.join(root, file)
-        return None
+        return self.catalog.find(pattern_name)
     
     def update_history(self, session_data):
         """Update interaction history with new session data"""
-        self.history["sessions"].append({
+        # Sequences continue from where the previous session left off
+        previous = self.last_session()
+        self.topic_transitions.update(session_data.get("topics", []), previous.get("topics", []))
+        self.pattern_transitions.update(session_data.get("patterns_used", []), previous.get("patterns", []))
+        self.topic_transitions.save()
+        self.pattern_transitions.save()
+        
+        # Vectors live in the memory-mapped matrix, so history is not capped
+        session = {
             "timestamp": datetime.now().isoformat(),
-            "vector": session_data.get("vector", []),
             "topics": session_data.get("topics", []),
             "patterns": session_data.get("patterns_used", [])
-        })
-        
-        # Keep only recent history (last 100 sessions)
-        self.history["sessions"] = self.history["sessions"][-100:]
+        }
+        if session_data.get("vector"):
+            session["row"] = self.vectors.append(session_data["vector"])
+        self.history["sessions"].append(session)
         
         # Update pattern frequency
         for pattern in session_data.get("patterns_used", []):
             self.history["patterns"][pattern] += 1
         
-        # Save history
+        self.save_history()
+    
+    def save_history(self):
+        """Save history"""
         with open(self.history_file, 'w') as f:
             json.dump(self.history, f, indent=2)
 
@@ -244,19 +288,7 @@ class DynamicChunkSizer:
     
     def calculate_shannon_entropy(self, text):
         """Calculate Shannon entropy of text"""
-        if not text:
-            return 0.0
-            
-        freq = Counter(text)
-        total = len(text)
-        
-        entropy = 0
-        for count in freq.values():
-            p = count / total
-            if p > 0:
-                entropy -= p * math.log2(p)
-                
-        return entropy
+        return shannon_entropy(text)
     
     def detect_high_latency(self):
         """Detect if system is experiencing high latency"""